@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import tempfile
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -84,6 +85,11 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Соединения с БД. DB_CONN_MAX_AGE - время жизни постоянного соединения в секундах (0 - новое соединение
+# на каждый запрос), DB_CONN_HEALTH_CHECKS - проверка постоянного соединения перед использованием в новом запросе.
+# DB_POOL=true - пул соединений psycopg (нужен пакет psycopg[pool]); с пулом постоянные соединения отключаются
+DB_POOL = os.getenv('DB_POOL', 'false').lower() in ('1', 'true', 'yes')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -92,6 +98,16 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST', 'localhost'),
         'PORT': os.getenv('DB_PORT', '5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'true').lower() in ('1', 'true', 'yes'),
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                # ожидание свободного соединения (сек.), после чего запрос завершается ошибкой
+                'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            },
+        } if DB_POOL else {},
     }
 }
 
@@ -148,4 +164,41 @@ REST_FRAMEWORK = {
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
     ],
-}
\ No newline at end of file
+}
+
+# Аналитика
+# Максимальное число игроков, на котором обучается кластеризация; остальные назначаются ближайшей core-точке
+CLUSTERING_MAX_POINTS = int(os.getenv('CLUSTERING_MAX_POINTS', '200000'))
+# Время жизни (сек.) закешированного результата DBSCAN анализа, используемого постраничными подзапросами
+ANALYSIS_CACHE_TIMEOUT = int(os.getenv('ANALYSIS_CACHE_TIMEOUT', '600'))
+# Назначение кластеров новым игрокам: при превышении доли шума над базовой на этот порог выполняется полный перерасчет
+CLUSTERING_DRIFT_THRESHOLD = float(os.getenv('CLUSTERING_DRIFT_THRESHOLD', '0.2'))
+CLUSTERING_DRIFT_MIN_PLAYERS = int(os.getenv('CLUSTERING_DRIFT_MIN_PLAYERS', '20'))
+# Пул процессов для кластеризации: число процессов (0 - вычисление в процессе веб-сервера), время ожидания
+# результата запросом (сек.) и способ запуска процессов (spawn не наследует соединения с БД веб-процесса)
+ANALYTICS_POOL_SIZE = int(os.getenv('ANALYTICS_POOL_SIZE', '2'))
+ANALYTICS_JOB_TIMEOUT = int(os.getenv('ANALYTICS_JOB_TIMEOUT', '120'))
+ANALYTICS_POOL_START_METHOD = os.getenv('ANALYTICS_POOL_START_METHOD', 'spawn')
+
+# Выгрузка статистики: число строк, читаемых из серверного курсора за раз (и размер группы строк Parquet)
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+
+# Кеш ответов API и результатов анализа. CACHE_BACKEND:
+# file - файловый кеш, общий для всех процессов одной машины (веб-сервер и команды импорта видят одни и те же сбросы);
+# locmem - память процесса, сбросы из команд импорта не доходят до веб-сервера до истечения времени жизни;
+# redis - общий кеш нескольких серверов (нужен пакет redis)
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'file')
+CACHE_BACKENDS = {
+    'file': ('django.core.cache.backends.filebased.FileBasedCache',
+             os.path.join(tempfile.gettempdir(), 'diploma-work-cache')),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'stats-api'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://127.0.0.1:6379/1'),
+}
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND][0],
+        'LOCATION': os.getenv('CACHE_LOCATION', CACHE_BACKENDS[CACHE_BACKEND][1]),
+    }
+}
+# Время жизни (сек.) закешированных ответов списков и карточек игроков и матчей
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', '300'))
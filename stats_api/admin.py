@@ -1,12 +1,23 @@
 from django.contrib import admin
-from .models import Player, Match, PlayerMatchStats
+from .models import Player, Match, PlayerMatchStats, ValorantMatchStats, PubgMatchStats
+
+
+class ValorantMatchStatsInline(admin.StackedInline):
+    model = ValorantMatchStats
+    can_delete = False
+
+
+class PubgMatchStatsInline(admin.StackedInline):
+    model = PubgMatchStats
+    can_delete = False
 
 
 class PlayerMatchStatsAdmin(admin.ModelAdmin):
     list_display = ('player', 'match', 'won_match', 'kills', 'deaths', 'assists', 'kda') # Отображаемые колонки
-    list_filter = ('player', 'match__match_timestamp', 'won_match') # Фильтры
+    list_filter = ('player', 'match_timestamp', 'won_match') # Фильтры
     search_fields = ('player__username', 'match__game_match_id') # Поиск по имени игрока или ID матча
     readonly_fields = ('kda',)
+    inlines = [ValorantMatchStatsInline, PubgMatchStatsInline]
 
 admin.site.register(Player)
 admin.site.register(Match)
@@ -0,0 +1,949 @@
+from rest_framework import status, views
+from rest_framework.response import Response
+from rest_framework.pagination import LimitOffsetPagination
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Avg, F, Min, Max
+from django.db.models.functions import Upper
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+import hashlib
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+
+import logging
+
+from .clustering import CLUSTERING_BACKENDS, assign_to_nearest_core, dump_array, fit_clustering, load_array
+from .features import (
+    DEFAULT_FEATURES,
+    PLAYER_FEATURES,
+    comparison_metrics,
+    features_for_game,
+    player_feature_aggregates,
+)
+from .jobs import AnalyticsJobTimeout, analytics_job_key, run_analytics_job
+from .models import (
+    Player, PlayerMatchStats, GameNames, ClusteringModel, RankGroupStatsSummary,
+    stats_field_path,
+)
+from .summaries import PLAYER_AVERAGE_MATCHES, build_rank_group_summaries, latest_player_averages
+from .versioning import get_data_version
+
+# Аналитика (DBSCAN, сравнение с группой ранга, форма игрока) на pandas/numpy/scikit-learn.
+# Модуль импортируется при первом запросе к этим эндпоинтам (lazy_view в urls.py), а не при старте процесса
+
+logger_views = logging.getLogger(__name__)
+
+
+# Вспомогательные функции
+def safe_division_scalar(numerator, denominator, default=0.0):
+    if numerator is None or denominator is None or pd.isna(numerator) or pd.isna(denominator) or denominator == 0:
+        return default
+    try:
+        result = numerator / denominator
+        if pd.isna(result) or result == float("inf") or result == float("-inf"):
+            return default
+        return result
+    except (TypeError, ZeroDivisionError):
+        return default
+
+
+def safe_division_series(numerator_series, denominator_series, default=0.0):
+    num_is_series = isinstance(numerator_series, pd.Series)
+    den_is_series = isinstance(denominator_series, pd.Series)
+
+    if not num_is_series and not den_is_series:
+        return safe_division_scalar(numerator_series, denominator_series, default)
+
+    if not num_is_series:
+        numerator_series = pd.Series(numerator_series, index=denominator_series.index if den_is_series else None)
+    if not den_is_series:
+        denominator_series = pd.Series(denominator_series, index=numerator_series.index if num_is_series else None)
+
+    if num_is_series and den_is_series and not numerator_series.index.equals(denominator_series.index):
+        logger_views.warning("Series for safe_division have mismatched indexes. Attempting to align if lengths match.")
+        if len(numerator_series) == len(denominator_series):
+            try:
+                denominator_series = denominator_series.reindex(numerator_series.index)
+            except Exception as e:
+                logger_views.error(f"Failed to reindex series in safe_division: {e}")
+                return pd.Series(default, index=numerator_series.index, dtype=float)
+        else:
+            return pd.Series(default, index=numerator_series.index, dtype=float)
+
+    result_series = pd.Series(default, index=numerator_series.index, dtype=float)
+    safe_condition = (denominator_series != 0) & (~pd.isna(denominator_series)) & (~pd.isna(numerator_series))
+
+    if safe_condition.any():
+        safe_num = numerator_series[safe_condition].astype(float)
+        safe_den = denominator_series[safe_condition].astype(float)
+        result_series.loc[safe_condition] = safe_num / safe_den
+
+    result_series.replace([np.inf, -np.inf], default, inplace=True)
+    result_series.fillna(default, inplace=True)
+    return result_series
+
+
+# Сборка ответа DBSCAN: колонки округляются один раз, записи формируются без построчного обхода DataFrame
+DBSCAN_RECORD_ROUNDING = {
+    "avg_kills": 2, "avg_deaths": 2, "avg_assists": 2, "avg_kda": 2,
+    "avg_headshot_rate": 1, "avg_damage_dealt": 1,
+    "avg_unique_game_abilities": 2, "combat_performance_score": 2,
+}
+
+
+def build_dbscan_player_records(df, game_name, feature_columns=()):
+    records = pd.DataFrame({
+        "player_id": df["player_id"].astype(int),
+        "puuid": df["player__puuid"].astype(object).where(df["player__puuid"].notna(), None),
+        "username": df["player__username"].astype(str),
+        "game_name": game_name,
+        "cluster": df["cluster"].astype(int),
+        "num_matches": df["num_matches"].fillna(0).astype(int),
+    }, index=df.index)
+    for column, digits in DBSCAN_RECORD_ROUNDING.items():
+        records[column] = df[column].fillna(0.0).astype(float).round(digits)
+    for column in feature_columns:
+        if column not in records.columns:
+            records[column] = df[column].fillna(0.0).astype(float).round(2)
+    return records.to_dict("records")
+
+
+def build_dbscan_scatter_points(df):
+    return [{"x": x, "y": y, "cluster": cluster, "username": username}
+            for x, y, cluster, username in zip(df["x"].astype(float).tolist(), df["y"].astype(float).tolist(),
+                                               df["cluster"].astype(int).tolist(), df["player__username"].tolist())]
+
+
+def group_records_by_cluster(df, game_name, feature_columns=()):
+    """Записи игроков, сгруппированные по кластерам в порядке возрастания номера кластера"""
+    sorted_df = df.sort_values("cluster", kind="stable")
+    records = build_dbscan_player_records(sorted_df, game_name, feature_columns)
+    cluster_ids, starts = np.unique(sorted_df["cluster"].to_numpy(), return_index=True)
+    bounds = list(starts) + [len(records)]
+    return {int(cluster_id): records[bounds[i]:bounds[i + 1]] for i, cluster_id in enumerate(cluster_ids)}
+
+
+COMBAT_SCORE_FEATURES = ['avg_kills', 'avg_kda', 'avg_damage_dealt', 'avg_headshot_rate', 'avg_deaths']
+
+
+def derived_feature_reference(df):
+    """Параметры производных признаков, зависящие от всей популяции игроков (границы нормализации и т.п.).
+    Сохраняются вместе с моделью кластеризации, чтобы новые игроки считались в той же шкале"""
+    combat_bounds = {}
+    for feature_name in COMBAT_SCORE_FEATURES:
+        if feature_name in df.columns and not df[feature_name].isnull().all():
+            median = float(df[feature_name].median())
+            series = df[feature_name].fillna(median)
+            combat_bounds[feature_name] = [float(series.min()), float(series.max()), median]
+        else:
+            combat_bounds[feature_name] = None
+    return {
+        "use_direct_unique_abilities": bool(
+            'avg_direct_unique_abilities' in df.columns and not df['avg_direct_unique_abilities'].fillna(0).eq(0).all()),
+        "combat_bounds": combat_bounds,
+    }
+
+
+def add_derived_features(df, game_name, reference=None):
+    """Вычисляет признаки, не являющиеся прямыми средними: avg_unique_game_abilities,
+    combat_performance_score и точность стрельбы (Valorant)"""
+    if reference is None:
+        reference = derived_feature_reference(df)
+
+    if reference["use_direct_unique_abilities"] and 'avg_direct_unique_abilities' in df.columns:
+        df['avg_unique_game_abilities'] = df['avg_direct_unique_abilities']
+        logger_views.info(f"DBSCAN для '{game_name}': Используются прямые значения 'avg_direct_unique_abilities'.")
+    elif game_name == GameNames.VALORANT.value and 'sum_skills_used' in df.columns and 'sum_ultimates_used' in df.columns:
+        df['avg_unique_game_abilities'] = safe_division_series(
+            df['sum_skills_used'].fillna(0) + df['sum_ultimates_used'].fillna(0),
+            df['num_matches']
+        )
+        logger_views.info(f"DBSCAN для '{game_name}': 'avg_unique_game_abilities' вычислено для Valorant.")
+    elif game_name == GameNames.PUBG.value and 'sum_heals_used' in df.columns and 'sum_boosts_used' in df.columns:
+        df['avg_unique_game_abilities'] = safe_division_series(
+            df['sum_heals_used'].fillna(0) + df['sum_boosts_used'].fillna(0),
+            df['num_matches']
+        )
+        logger_views.info(f"DBSCAN для '{game_name}': 'avg_unique_game_abilities' вычислено для PUBG.")
+    elif 'avg_direct_unique_abilities' in df.columns:
+        df['avg_unique_game_abilities'] = df['avg_direct_unique_abilities']
+        logger_views.info(
+            f"DBSCAN для '{game_name}': 'avg_unique_game_abilities' взято из пустого/нулевого 'avg_direct_unique_abilities'.")
+    else:
+        df['avg_unique_game_abilities'] = 0.0
+        logger_views.info(
+            f"DBSCAN для '{game_name}': 'avg_unique_game_abilities' установлено в 0 (нет данных или специфичной логики).")
+
+    df['avg_unique_game_abilities'] = df['avg_unique_game_abilities'].fillna(0)
+    if 'avg_direct_unique_abilities' in df.columns:
+        df = df.drop(columns=['avg_direct_unique_abilities'])
+
+    if 'sum_shots_hitted' in df.columns and 'sum_shots_fired' in df.columns:
+        df['shot_accuracy'] = safe_division_series(df['sum_shots_hitted'], df['sum_shots_fired']) * 100
+
+    # пасчет combat_performance_score: сумма нормализованных показателей, смерти инвертируются
+    combat_score_components_data = {}
+    for feature_name in COMBAT_SCORE_FEATURES:
+        bounds = reference["combat_bounds"].get(feature_name)
+        if bounds is None or feature_name not in df.columns:
+            combat_score_components_data[feature_name] = pd.Series(0.0, index=df.index, dtype=float)
+            continue
+        min_val, max_val, median = bounds
+        series = df[feature_name].fillna(median)
+        normalized = (series - min_val) / (max_val - min_val) if max_val > min_val \
+            else pd.Series(0.5, index=df.index, dtype=float)
+        combat_score_components_data[feature_name] = 1 - normalized if feature_name == 'avg_deaths' else normalized
+
+    combat_score_df = pd.DataFrame(combat_score_components_data)
+    df['combat_performance_score'] = combat_score_df.sum(axis=1).fillna(0) if not combat_score_df.empty else 0.0
+    return df
+
+
+class DBSCANAnalysisView(views.APIView):
+    permission_classes = []
+
+    def handle_exception(self, exc):
+        # кластеризация в пуле процессов не уложилась в ANALYTICS_JOB_TIMEOUT - клиент повторяет запрос позже
+        if isinstance(exc, AnalyticsJobTimeout):
+            return Response({"error": str(exc)}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={"Retry-After": str(settings.ANALYTICS_JOB_TIMEOUT)})
+        return super().handle_exception(exc)
+
+    def _parse_params(self, request):
+        game_name = request.query_params.get('game_name', '').strip().lower()
+        if not game_name:
+            return None, Response(
+                {"error": "Параметр 'game_name' обязателен."},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            eps = float(request.query_params.get('eps', 0.3))
+            min_samples = int(request.query_params.get('min_samples', 4))
+            min_matches_for_analysis = int(request.query_params.get('min_matches', 5))
+            n_clusters = int(request.query_params.get('n_clusters', 8))
+            min_cluster_size = request.query_params.get('min_cluster_size')
+            min_cluster_size = int(min_cluster_size) if min_cluster_size else None
+            sample_size = request.query_params.get('sample_size')
+            sample_size = int(sample_size) if sample_size else None
+            days = request.query_params.get('days')
+            days = int(days) if days else None
+        except ValueError:
+            return None, Response(
+                {"error": "Параметры 'eps', 'min_samples', 'min_matches', 'n_clusters', 'min_cluster_size', "
+                          "'sample_size', 'days' должны быть числами."},
+                status=status.HTTP_400_BAD_REQUEST)
+        ranked_only = request.query_params.get('ranked_only', '').strip().lower() in ['true', '1', 'yes']
+        map_name = request.query_params.get('map_name', '').strip() or None
+
+        backend = request.query_params.get('backend', 'dbscan').strip().lower()
+        if backend not in CLUSTERING_BACKENDS:
+            return None, Response(
+                {"error": f"Параметр 'backend' должен быть одним из: {', '.join(CLUSTERING_BACKENDS)}."},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        features_param = request.query_params.get('features', '').strip()
+        features = tuple(f.strip() for f in features_param.split(',') if f.strip()) if features_param \
+            else DEFAULT_FEATURES
+        available_features = features_for_game(game_name)
+        unknown_features = [f for f in features if f not in available_features]
+        if unknown_features or len(set(features)) != len(features):
+            return None, Response(
+                {"error": f"Недопустимые признаки: {', '.join(unknown_features) or 'повторяются'}. "
+                          f"Доступны для игры '{game_name}': {', '.join(available_features)}."},
+                status=status.HTTP_400_BAD_REQUEST)
+
+        return {
+            "game_name": game_name, "eps": eps, "min_samples": min_samples,
+            "min_matches": min_matches_for_analysis, "backend": backend, "n_clusters": n_clusters,
+            "min_cluster_size": min_cluster_size, "sample_size": sample_size, "features": features,
+            "days": days, "ranked_only": ranked_only, "map_name": map_name,
+        }, None
+
+    def _get_analysis(self, params, refresh=False):
+        """Результат анализа для набора параметров; кешируется, чтобы подзапросы игроков кластера не пересчитывали его.
+        refresh=True - полный перерасчет с обновлением кеша и сохраненной модели игры (recluster);
+        обычные запросы модель не меняют. Версия данных игры входит в ключ: после импорта кеш не используется"""
+        params_key = "|".join(f"{k}={params[k]}" for k in sorted(params))
+        params_key += f"|data_version={get_data_version(params['game_name'])[0]}"
+        cache_key = "dbscan-analysis:" + hashlib.md5(params_key.encode()).hexdigest()
+        analysis = None if refresh else cache.get(cache_key)
+        if analysis is None:
+            analysis = self._run_analysis(params, refresh=refresh)
+            cache.set(cache_key, analysis, settings.ANALYSIS_CACHE_TIMEOUT)
+        return analysis
+
+    def _player_aggregates_queryset(self, params):
+        """Агрегация по игрокам; фильтры по матчам (период, ранговые, карта) применяются в SQL до группировки"""
+        match_filters = Q(game_name=params["game_name"])
+        if params.get("days"):
+            match_filters &= Q(match_timestamp__gte=timezone.now() - timedelta(days=params["days"]))
+        if params.get("ranked_only"):
+            match_filters &= Q(is_ranked=True)
+        if params.get("map_name"):
+            match_filters &= Q(map_name=params["map_name"])
+
+        return PlayerMatchStats.objects.filter(
+            match_filters
+        ).values(
+            'player_id',
+            'player__username',
+            'player__puuid'
+        ).annotate(
+            **player_feature_aggregates(params["game_name"])
+        ).filter(
+            num_matches__gte=params["min_matches"]
+        ).order_by('player_id')
+
+    def _get_player_aggregates(self, params, refresh=False):
+        """Агрегаты всех признаков игры по игрокам и параметры производных признаков;
+        общие для любых наборов признаков, поэтому кешируются отдельно (до изменения версии данных игры)"""
+        game_name = params["game_name"]
+        aggregates_key = "|".join(str(params.get(k)) for k in ("game_name", "min_matches", "days", "ranked_only", "map_name"))
+        aggregates_key += f"|{get_data_version(game_name)[0]}"
+        cache_key = "player-feature-aggregates:" + hashlib.md5(aggregates_key.encode()).hexdigest()
+        aggregates = None if refresh else cache.get(cache_key)
+        if aggregates is None:
+            df = pd.DataFrame.from_records(list(self._player_aggregates_queryset(params)))
+            reference = None
+            if not df.empty:
+                reference = derived_feature_reference(df)
+                df = add_derived_features(df, game_name, reference)
+            aggregates = (df, reference)
+            cache.set(cache_key, aggregates, settings.ANALYSIS_CACHE_TIMEOUT)
+        return aggregates
+
+    def _save_clustering_model(self, params, reference, clustering_result):
+        labels = clustering_result["labels"]
+        # DBSCAN - общее eps, HDBSCAN - радиус каждого представителя кластера
+        max_distance = clustering_result["max_distance"]
+        per_core = max_distance is not None and np.ndim(max_distance) > 0
+        ClusteringModel.objects.update_or_create(
+            game_name=params["game_name"],
+            defaults={
+                "backend": params["backend"],
+                "params": {**params, "features": list(params["features"])},
+                "feature_reference": reference,
+                "scaler_mean": clustering_result["scaler_mean"],
+                "scaler_scale": clustering_result["scaler_scale"],
+                "core_points": dump_array(clustering_result["core_points"]),
+                "core_labels": dump_array(clustering_result["core_labels"]),
+                "max_distance": None if per_core else max_distance,
+                "core_radii": dump_array(max_distance) if per_core else None,
+                "players_clustered": len(labels),
+                "noise_ratio": float(np.mean(labels == -1)) if len(labels) else 0.0,
+            }
+        )
+
+    def _run_analysis(self, params, refresh=False):
+        """Возвращает (df, analysis_details); df содержит колонки x, y, cluster или равен None, если анализ невозможен.
+        Модель для назначения кластеров сохраняется только при полном перерасчете (refresh=True)"""
+        game_name = params["game_name"]
+        eps = params["eps"]
+        min_samples = params["min_samples"]
+        min_matches_for_analysis = params["min_matches"]
+        backend = params["backend"]
+        sample_size = params["sample_size"]
+        features = list(params["features"])
+
+        if len(features) == 2:
+            x_axis_label = f"{PLAYER_FEATURES[features[0]]['label']} (масштаб.)"
+            y_axis_label = f"{PLAYER_FEATURES[features[1]]['label']} (масштаб.)"
+        elif len(features) == 1:
+            x_axis_label = f"{PLAYER_FEATURES[features[0]]['label']} (масштаб.)"
+            y_axis_label = ""
+        else:
+            x_axis_label, y_axis_label = "PC1", "PC2"
+
+        df, reference = self._get_player_aggregates(params, refresh=refresh)
+        if df.empty:
+            return None, {
+                "game_name": game_name, "eps": eps, "min_samples": min_samples,
+                "min_matches_per_player": min_matches_for_analysis,
+                "message": f"Нет данных для анализа DBSCAN для игры '{game_name}' с мин. {min_matches_for_analysis} матчей.",
+                "total_players_analyzed": 0, "clusters_found": 0, "noise_points": 0,
+                "features_used": features,
+                "x_axis_label": x_axis_label,
+                "y_axis_label": y_axis_label
+            }
+
+        missing_features = [f for f in features if f not in df.columns]
+        if missing_features:
+            logger_views.error(f"DBSCAN для '{game_name}': Отсутствуют колонки для анализа: {missing_features}")
+            return None, {"game_name": game_name,
+                          "message": f"Отсутствуют данные для фич: {', '.join(missing_features)}",
+                          "total_players_analyzed": df.shape[0], "clusters_found": 0, "noise_points": 0,
+                          "features_used": features, "x_axis_label": x_axis_label,
+                          "y_axis_label": y_axis_label}
+
+        X = df[features].fillna(0).values
+
+        # при большом числе игроков обучаемся на выборке, чтобы время ответа и память оставались ограниченными
+        max_points = settings.CLUSTERING_MAX_POINTS
+        if max_points and X.shape[0] > max_points and (not sample_size or sample_size > max_points):
+            sample_size = max_points
+
+        # масштабирование, кластеризация и проекция на плоскость выполняются в пуле процессов аналитики;
+        # одинаковые задачи (те же точки и параметры), запущенные одновременно, считаются один раз
+        clustering_params = dict(backend=backend, eps=eps, min_samples=min_samples, n_clusters=params["n_clusters"],
+                                 min_cluster_size=params["min_cluster_size"], sample_size=sample_size)
+        clustering_result = run_analytics_job(
+            analytics_job_key("fit_clustering", X, clustering_params), fit_clustering, X, **clustering_params)
+        cluster_labels = clustering_result["labels"]
+        if refresh:
+            self._save_clustering_model(params, reference, clustering_result)
+
+        xy = clustering_result["xy"]
+        explained_variance = clustering_result["explained_variance"]
+        if explained_variance:
+            x_axis_label = f"PC1 ({explained_variance[0]:.0%} дисперсии)"
+            y_axis_label = f"PC2 ({explained_variance[1]:.0%} дисперсии)"
+
+        df = df.copy()
+        df['x'] = xy[:, 0]
+        df['y'] = xy[:, 1]
+        df['cluster'] = cluster_labels
+
+        return df, {
+            "game_name": game_name, "eps": eps, "min_samples": min_samples,
+            "min_matches_per_player": min_matches_for_analysis,
+            "clustering_backend": backend,
+            "sampled_points": clustering_result["sampled_points"],
+            "filters": {"days": params["days"], "ranked_only": params["ranked_only"], "map_name": params["map_name"]},
+            "features_used": features,
+            "projection": "pca" if explained_variance else None,
+            "explained_variance_ratio": explained_variance,
+            "total_players_analyzed": X.shape[0],
+            "clusters_found": len(set(label for label in cluster_labels if label != -1)),
+            "noise_points": int(np.sum(cluster_labels == -1)),
+            "x_axis_label": x_axis_label, "y_axis_label": y_axis_label
+        }
+
+    def get(self, request, *args, **kwargs):
+        params, error_response = self._parse_params(request)
+        if error_response:
+            return error_response
+
+        recluster = request.query_params.get('recluster', '').strip().lower() in ['true', '1', 'yes']
+        try:
+            df, analysis_details = self._get_analysis(params, refresh=recluster)
+        except ValueError as e:
+            return Response({"error": f"Ошибка параметров кластеризации: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        compact = request.query_params.get('mode', '').strip().lower() == 'compact'
+
+        if df is None:
+            return Response({
+                "analysis_details": analysis_details,
+                "clustered_players": {},
+                "scatter_plot_data": {} if compact else [],
+            }, status=status.HTTP_200_OK)
+
+        if compact:
+            # параллельные массивы вместо списка объектов; детали игроков - через cluster-players
+            cluster_ids, cluster_sizes = np.unique(df['cluster'].to_numpy(), return_counts=True)
+            return Response({
+                "analysis_details": analysis_details,
+                "cluster_sizes": {int(c): int(n) for c, n in zip(cluster_ids, cluster_sizes)},
+                "scatter_plot_data": {
+                    "player_id": df['player_id'].to_numpy().tolist(),
+                    "x": df['x'].to_numpy().round(4).tolist(),
+                    "y": df['y'].to_numpy().round(4).tolist(),
+                    "cluster": df['cluster'].to_numpy().tolist(),
+                },
+            }, status=status.HTTP_200_OK)
+
+        return Response({
+            "analysis_details": analysis_details,
+            "clustered_players": group_records_by_cluster(df, params["game_name"], params["features"]),
+            "scatter_plot_data": build_dbscan_scatter_points(df),
+        }, status=status.HTTP_200_OK)
+
+
+class DBSCANClusterPlayersView(DBSCANAnalysisView):
+    """Постраничный список игроков одного кластера для компактного режима DBSCAN анализа"""
+
+    def get(self, request, *args, **kwargs):
+        params, error_response = self._parse_params(request)
+        if error_response:
+            return error_response
+        try:
+            cluster = int(request.query_params.get('cluster', ''))
+        except ValueError:
+            return Response({"error": "Параметр 'cluster' обязателен и должен быть числом."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            df, analysis_details = self._get_analysis(params)
+        except ValueError as e:
+            return Response({"error": f"Ошибка параметров кластеризации: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        cluster_df = df[df['cluster'].to_numpy() == cluster] if df is not None else pd.DataFrame()
+
+        paginator = LimitOffsetPagination()
+        page_positions = paginator.paginate_queryset(range(cluster_df.shape[0]), request, view=self)
+        page_records = build_dbscan_player_records(cluster_df.iloc[page_positions], params["game_name"],
+                                                   params["features"]) \
+            if page_positions else []
+        return paginator.get_paginated_response(page_records)
+
+
+class DBSCANAssignView(DBSCANAnalysisView):
+    """Назначение кластеров новым или обновленным игрокам по сохраненной модели игры (ближайшая core-точка).
+    Полный перерасчет выполняется по запросу (recluster) или при превышении порога дрейфа"""
+    http_method_names = ['post', 'options']
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Тело запроса должно быть JSON-объектом."}, status=status.HTTP_400_BAD_REQUEST)
+        game_name = str(request.data.get('game_name', '')).strip().lower()
+        puuids = request.data.get('puuids') or []
+        since_str = str(request.data.get('since', '')).strip()
+        force_recluster = str(request.data.get('recluster', '')).lower() in ['true', '1', 'yes']
+
+        if not game_name:
+            return Response({"error": "Параметр 'game_name' обязателен."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(puuids, list) or (not puuids and not since_str):
+            return Response({"error": "Необходимо указать список 'puuids' или 'since'."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            clustering_model = ClusteringModel.objects.get(game_name=game_name)
+        except ClusteringModel.DoesNotExist:
+            return Response({"error": f"Для игры '{game_name}' нет сохраненной модели. Сначала выполните полный анализ "
+                                      f"(recluster=true)."},
+                            status=status.HTTP_404_NOT_FOUND)
+
+        players_qs = Player.objects.filter(game_name=game_name)
+        if puuids:
+            players_qs = players_qs.filter(puuid__in=puuids)
+        if since_str:
+            since = parse_datetime(since_str)
+            if not since:
+                return Response({"error": f"Неверный формат 'since': {since_str}"}, status=status.HTTP_400_BAD_REQUEST)
+            players_qs = players_qs.filter(
+                Q(created_at__gte=since) | Q(match_stats__match_timestamp__gte=since))
+
+        params = {**clustering_model.params, "features": tuple(clustering_model.params["features"])}
+        df = pd.DataFrame.from_records(list(
+            self._player_aggregates_queryset(params).filter(
+                player_id__in=players_qs.values('id'))))
+        if df.empty:
+            return Response({"game_name": game_name, "reclustered": False, "assignments": []},
+                            status=status.HTTP_200_OK)
+
+        df = add_derived_features(df, game_name, clustering_model.feature_reference)
+        X = df[list(params["features"])].fillna(0).values
+        X_scaled = (X - np.asarray(clustering_model.scaler_mean)) / np.asarray(clustering_model.scaler_scale)
+        max_distance = load_array(clustering_model.core_radii) if clustering_model.core_radii is not None \
+            else clustering_model.max_distance
+        labels = assign_to_nearest_core(X_scaled, load_array(clustering_model.core_points),
+                                        load_array(clustering_model.core_labels), max_distance)
+
+        # дрейф: насколько доля шума среди новых игроков превышает долю шума при полном расчете
+        drift = float(np.mean(labels == -1)) - clustering_model.noise_ratio
+        reclustered = force_recluster or (
+                len(labels) >= settings.CLUSTERING_DRIFT_MIN_PLAYERS and drift > settings.CLUSTERING_DRIFT_THRESHOLD)
+        if reclustered:
+            logger_views.info(f"Полный перерасчет кластеров для '{game_name}' (дрейф {drift:.3f}).")
+            full_df, _ = self._get_analysis(params, refresh=True)
+            labels_by_player = dict(zip(full_df['player_id'].tolist(), full_df['cluster'].tolist())) \
+                if full_df is not None else {}
+            labels = np.array([labels_by_player.get(player_id, -1) for player_id in df['player_id'].tolist()])
+            clustering_model.refresh_from_db()
+
+        df['cluster'] = labels
+        return Response({
+            "game_name": game_name,
+            "model": {
+                "backend": clustering_model.backend,
+                "features": list(params["features"]),
+                "updated_at": clustering_model.updated_at,
+            },
+            "drift": round(drift, 4),
+            "drift_threshold": settings.CLUSTERING_DRIFT_THRESHOLD,
+            "reclustered": reclustered,
+            "assignments": build_dbscan_player_records(df, game_name, params["features"]),
+        }, status=status.HTTP_200_OK)
+
+
+class PlayerComparisonView(views.APIView):
+    """API эндпоинт для сравнительного анализа игрока"""
+    permission_classes = []
+    last_matches_count = PLAYER_AVERAGE_MATCHES
+
+    def _calculate_player_avg_stats(self, target_player, game_name):
+        """Средние показатели игрока за последние матчи - один запрос с агрегатом над подзапросом с LIMIT"""
+        player_latest_stats_qs = PlayerMatchStats.objects.filter(
+            player=target_player
+        ).order_by(F('match_timestamp').desc(nulls_last=True), '-id')[:self.last_matches_count]
+
+        metrics_to_agg = {f'avg_{metric}': Avg(stats_field_path(metric)) for metric in comparison_metrics(game_name)}
+        aggregates = player_latest_stats_qs.aggregate(matches_analyzed=Count('id'), **metrics_to_agg)
+        matches_analyzed = aggregates.pop('matches_analyzed')
+        if not matches_analyzed:
+            return None, 0
+        return aggregates, matches_analyzed
+
+    def _calculate_group_stats(self, group_stats_qs, game_name, player_avg_stats):
+        """Границы (min/max/avg) по матчам группы и перцентиль игрока для каждой метрики - два агрегатных запроса.
+        Перцентиль - доля игроков группы, чье среднее за последние last_matches_count матчей ниже среднего игрока"""
+        agg_kwargs = {'player_count': Count('player', distinct=True)}
+        below_kwargs = {}
+        for metric in comparison_metrics(game_name):
+            path = stats_field_path(metric)
+            agg_kwargs.update({f'{metric}_min': Min(path), f'{metric}_max': Max(path), f'{metric}_avg': Avg(path)})
+            player_value = player_avg_stats.get(f'avg_{metric}')
+            if player_value is not None:
+                below_kwargs.update({
+                    f'{metric}_count': Count('player_id', filter=Q(**{f'avg_{metric}__isnull': False})),
+                    f'{metric}_below': Count('player_id', filter=Q(**{f'avg_{metric}__lt': player_value})),
+                })
+        aggregated_results = group_stats_qs.aggregate(**agg_kwargs)
+
+        player_count = aggregated_results['player_count']
+        if not player_count:
+            return 0, None, None
+        if below_kwargs:
+            aggregated_results.update(latest_player_averages(
+                group_stats_qs, game_name, self.last_matches_count).aggregate(**below_kwargs))
+
+        stats_boundaries, percentiles = {}, {}
+        for metric in comparison_metrics(game_name):
+            stats_boundaries[f'avg_{metric}'] = {
+                'min': round(aggregated_results.get(f'{metric}_min', 0) or 0, 2),
+                'max': round(aggregated_results.get(f'{metric}_max', 0) or 0, 2),
+                'avg': round(aggregated_results.get(f'{metric}_avg', 0) or 0, 2),
+            }
+            below = aggregated_results.get(f'{metric}_below')
+            total = aggregated_results.get(f'{metric}_count')
+            percentiles[f'avg_{metric}'] = round(below / total * 100, 1) if below is not None and total else None
+        return player_count, stats_boundaries, percentiles
+
+    def _group_stats_from_summaries(self, game_name, comparison_rank, player_avg_stats):
+        """Границы и перцентили из предрасчитанных сводок ранга (refresh_rank_group_stats) - без сканирования матчей.
+        Сводка включает всех игроков ранга, в том числе самого игрока. None, если сводок нет"""
+        summaries = {summary.metric: summary for summary in
+                     RankGroupStatsSummary.objects.filter(game_name=game_name, rank=comparison_rank)}
+        metrics = comparison_metrics(game_name)
+        if not summaries or any(metric not in summaries for metric in metrics):
+            return None
+
+        stats_boundaries, percentiles = {}, {}
+        for metric in metrics:
+            summary = summaries[metric]
+            stats_boundaries[f'avg_{metric}'] = {
+                'min': round(summary.min_value or 0, 2),
+                'max': round(summary.max_value or 0, 2),
+                'avg': round(summary.mean_value or 0, 2),
+            }
+            percentiles[f'avg_{metric}'] = summary.percentile_of(player_avg_stats.get(f'avg_{metric}'))
+        any_summary = summaries[metrics[0]]
+        return any_summary.player_count, stats_boundaries, percentiles, any_summary.refreshed_at
+
+    def get(self, request, *args, **kwargs):
+        game_name = request.query_params.get('game_name')
+        puuid = request.query_params.get('puuid')
+        username = request.query_params.get('username')
+        comparison_rank = request.query_params.get('comparison_rank')
+        exact = request.query_params.get('exact', '').strip().lower() in ['true', '1', 'yes']
+
+        if not game_name:
+            return Response({"error": "Параметр 'game_name' обязателен."}, status=status.HTTP_400_BAD_REQUEST)
+        if not puuid and not username:
+            return Response({"error": "Необходимо указать 'puuid' или 'username'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if puuid:
+                target_player = Player.objects.puuid_iexact(puuid).get(game_name=game_name)
+            else:
+                target_player = Player.objects.username_iexact(username).filter(game_name=game_name).first()
+
+            if not target_player:
+                raise Player.DoesNotExist
+
+        except Player.DoesNotExist:
+            return Response({"error": "Игрок не найден."}, status=status.HTTP_404_NOT_FOUND)
+
+        # считаем статистику игрока для сравнения
+        target_player_avg_stats, matches_analyzed = self._calculate_player_avg_stats(target_player, game_name)
+        if not target_player_avg_stats:
+            return Response({
+                "error": f"Для игрока {target_player.username} не найдено достаточно матчей для анализа."
+            }, status=status.HTTP_404_NOT_FOUND)
+
+        # считаем статистику для группы сравнения
+        comparison_group_boundaries = None
+        comparison_percentiles = None
+        player_count_in_rank = 0
+        comparison_source = None
+        summaries_refreshed_at = None
+        summary_stats = self._group_stats_from_summaries(game_name, comparison_rank, target_player_avg_stats) \
+            if comparison_rank and not exact else None
+        if summary_stats:
+            player_count_in_rank, comparison_group_boundaries, comparison_percentiles, summaries_refreshed_at = summary_stats
+            if target_player.rank == comparison_rank:
+                player_count_in_rank = max(player_count_in_rank - 1, 0)
+            comparison_source = "summary"
+        elif comparison_rank:
+            comparison_source = "live"
+            comparison_stats_qs = PlayerMatchStats.objects.filter(
+                game_name=game_name,
+                player__game_name=game_name,
+                player__rank=comparison_rank
+            ).exclude(player_id=target_player.id)
+            player_count_in_rank, comparison_group_boundaries, comparison_percentiles = self._calculate_group_stats(
+                comparison_stats_qs, game_name, target_player_avg_stats)
+
+        # получаем список всех доступных рангов
+        available_ranks = list(Player.objects.filter(
+            game_name=game_name, rank__isnull=False
+        ).exclude(rank='').values_list('rank', flat=True).distinct().order_by('rank'))
+
+        response_data = {
+            "target_player": {
+                "id": target_player.id,
+                "username": target_player.username,
+                "rank": target_player.rank,
+                "stats": {key: round(value, 2) if value is not None else None
+                          for key, value in target_player_avg_stats.items()},
+                "matches_analyzed": matches_analyzed
+            },
+            "comparison_group": {
+                "rank": comparison_rank,
+                "player_count": player_count_in_rank,
+                "stats_boundaries": comparison_group_boundaries,
+                "percentiles": comparison_percentiles,
+                "source": comparison_source,
+                "summaries_refreshed_at": summaries_refreshed_at
+            },
+            "available_ranks": available_ranks
+        }
+
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+class PlayerComparisonBatchView(PlayerComparisonView):
+    """API эндпоинт для сравнения списка игроков с одной группой ранга за один запрос"""
+    max_players = 200
+    max_matches_count = 100
+    http_method_names = ['post', 'options']
+
+    def _find_players(self, game_name, puuids, usernames):
+        """Игроки по puuid/username без учета регистра - один запрос"""
+        # выражения совпадают с функциональными индексами по UPPER(puuid)/UPPER(username)
+        puuids_upper = {value.upper() for value in puuids}
+        usernames_upper = {value.upper() for value in usernames}
+        players = Player.objects.filter(game_name=game_name).annotate(
+            puuid_upper=Upper('puuid'), username_upper=Upper('username')
+        ).filter(Q(puuid_upper__in=puuids_upper) | Q(username_upper__in=usernames_upper)).order_by('id')
+
+        found, found_keys = [], set()
+        for player in players:
+            found.append(player)
+            found_keys.update({('puuid', player.puuid_upper), ('username', player.username_upper)})
+        not_found = [value for value in puuids if ('puuid', value.upper()) not in found_keys] + \
+                    [value for value in usernames if ('username', value.upper()) not in found_keys]
+        return found, not_found
+
+    def _calculate_players_avg_stats(self, player_ids, game_name, last_n):
+        """Средние показатели за последние last_n матчей для всех игроков - один запрос, строка на игрока"""
+        rows = latest_player_averages(PlayerMatchStats.objects.filter(player_id__in=player_ids), game_name, last_n)
+        return {
+            row['player_id']: ({f'avg_{metric}': row[f'avg_{metric}'] for metric in comparison_metrics(game_name)},
+                               row['matches_analyzed'])
+            for row in rows
+        }
+
+    def _group_summaries(self, game_name, comparison_rank, exact):
+        """Сводки метрик группы ранга: предрасчитанные или построенные на лету (без сохранения)"""
+        metrics = comparison_metrics(game_name)
+        if not exact:
+            summaries = {summary.metric: summary for summary in
+                         RankGroupStatsSummary.objects.filter(game_name=game_name, rank=comparison_rank)}
+            if summaries and all(metric in summaries for metric in metrics):
+                return {metric: summaries[metric] for metric in metrics}, "summary"
+        summaries = {summary.metric: summary for summary in build_rank_group_summaries(game_name, comparison_rank)
+                     if summary.rank == comparison_rank}
+        return summaries, "live"
+
+    def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Тело запроса должно быть JSON-объектом."}, status=status.HTTP_400_BAD_REQUEST)
+        game_name = request.data.get('game_name')
+        comparison_rank = request.data.get('comparison_rank')
+        puuids = request.data.get('puuids') or []
+        usernames = request.data.get('usernames') or []
+        exact = str(request.data.get('exact', '')).strip().lower() in ['true', '1', 'yes']
+
+        if not game_name:
+            return Response({"error": "Параметр 'game_name' обязателен."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(puuids, list) or not isinstance(usernames, list):
+            return Response({"error": "'puuids' и 'usernames' должны быть списками."}, status=status.HTTP_400_BAD_REQUEST)
+        puuids = [str(value) for value in puuids if value]
+        usernames = [str(value) for value in usernames if value]
+        if not puuids and not usernames:
+            return Response({"error": "Необходимо указать 'puuids' или 'usernames'."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(puuids) + len(usernames) > self.max_players:
+            return Response({"error": f"Не более {self.max_players} игроков за запрос."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            last_n = int(request.data.get('last_n', self.last_matches_count))
+            if not 1 <= last_n <= self.max_matches_count:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response({"error": f"'last_n' должен быть целым числом от 1 до {self.max_matches_count}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        players, not_found = self._find_players(game_name, puuids, usernames)
+        players_avg_stats = self._calculate_players_avg_stats([player.id for player in players], game_name, last_n)
+
+        # группа сравнения считается один раз для всех игроков
+        comparison_group = {"rank": comparison_rank, "player_count": 0, "stats_boundaries": None,
+                            "source": None, "summaries_refreshed_at": None}
+        summaries = {}
+        if comparison_rank:
+            summaries, comparison_group["source"] = self._group_summaries(game_name, comparison_rank, exact)
+            if summaries:
+                any_summary = next(iter(summaries.values()))
+                comparison_group["player_count"] = any_summary.player_count
+                comparison_group["summaries_refreshed_at"] = any_summary.refreshed_at
+                comparison_group["stats_boundaries"] = {
+                    f'avg_{metric}': {
+                        'min': round(summary.min_value or 0, 2),
+                        'max': round(summary.max_value or 0, 2),
+                        'avg': round(summary.mean_value or 0, 2),
+                    } for metric, summary in summaries.items()
+                }
+
+        results = []
+        for player in players:
+            avg_stats, matches_analyzed = players_avg_stats.get(player.id, (None, 0))
+            results.append({
+                "id": player.id,
+                "puuid": player.puuid,
+                "username": player.username,
+                "rank": player.rank,
+                "matches_analyzed": matches_analyzed,
+                "stats": {key: round(value, 2) if value is not None else None
+                          for key, value in avg_stats.items()} if avg_stats else None,
+                "percentiles": {f'avg_{metric}': summary.percentile_of(avg_stats.get(f'avg_{metric}'))
+                                for metric, summary in summaries.items()} if avg_stats and summaries else None,
+            })
+
+        return Response({
+            "game_name": game_name,
+            "last_n": last_n,
+            "comparison_group": comparison_group,
+            "results": results,
+            "not_found": not_found,
+        }, status=status.HTTP_200_OK)
+
+
+class PlayerFormView(views.APIView):
+    """API эндпоинт для динамики формы игрока: скользящее среднее и EWMA метрик по последним матчам"""
+    permission_classes = []
+    default_metrics = ("kda", "damage_dealt", "headshot_rate")
+    default_last_n = 100
+    default_window = 10
+    max_last_n = 1000
+    resolutions = {"match": None, "day": "D", "week": "W"}
+
+    def _parse_int(self, request, name, default, low, high):
+        try:
+            value = int(request.query_params.get(name, default))
+        except (TypeError, ValueError):
+            value = None
+        if value is None or not low <= value <= high:
+            raise ValueError(f"'{name}' должен быть целым числом от {low} до {high}.")
+        return value
+
+    def get(self, request, *args, **kwargs):
+        game_name = request.query_params.get('game_name', '').strip().lower()
+        puuid = request.query_params.get('puuid')
+        username = request.query_params.get('username')
+        resolution = request.query_params.get('resolution', 'match').strip().lower()
+
+        if not game_name:
+            return Response({"error": "Параметр 'game_name' обязателен."}, status=status.HTTP_400_BAD_REQUEST)
+        if not puuid and not username:
+            return Response({"error": "Необходимо указать 'puuid' или 'username'."}, status=status.HTTP_400_BAD_REQUEST)
+        if resolution not in self.resolutions:
+            return Response({"error": f"Параметр 'resolution' должен быть одним из: {', '.join(self.resolutions)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        available_metrics = comparison_metrics(game_name)
+        metrics_param = request.query_params.get('metrics')
+        metrics = [m.strip() for m in metrics_param.split(',') if m.strip()] if metrics_param else list(self.default_metrics)
+        unknown_metrics = [metric for metric in metrics if metric not in available_metrics]
+        if unknown_metrics:
+            return Response({"error": f"Неизвестные метрики: {', '.join(unknown_metrics)}. "
+                                      f"Доступны: {', '.join(available_metrics)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            last_n = self._parse_int(request, 'last_n', self.default_last_n, 1, self.max_last_n)
+            window = self._parse_int(request, 'window', min(self.default_window, last_n), 1, last_n)
+            span = self._parse_int(request, 'span', window, 1, last_n)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if puuid:
+            target_player = Player.objects.puuid_iexact(puuid).filter(game_name=game_name).first()
+        else:
+            target_player = Player.objects.username_iexact(username).filter(game_name=game_name).first()
+        if not target_player:
+            return Response({"error": "Игрок не найден."}, status=status.HTTP_404_NOT_FOUND)
+
+        # одна упорядоченная выборка последних матчей, окна считаются векторно в pandas
+        rows = list(PlayerMatchStats.objects.filter(
+            player=target_player, match_timestamp__isnull=False
+        ).order_by(F('match_timestamp').desc(nulls_last=True), '-id').values_list(
+            'match_timestamp', *map(stats_field_path, metrics))[:last_n])
+        df = pd.DataFrame(rows[::-1], columns=['match_timestamp', *metrics])
+        if df.empty:
+            return Response({"error": f"Для игрока {target_player.username} не найдено матчей."},
+                            status=status.HTTP_404_NOT_FOUND)
+        df[metrics] = df[metrics].apply(pd.to_numeric, errors='coerce')
+
+        series = {}
+        for metric in metrics:
+            series[metric] = pd.DataFrame({
+                "value": df[metric],
+                "rolling": df[metric].rolling(window, min_periods=1).mean(),
+                "ewma": df[metric].ewm(span=span, min_periods=1, ignore_na=True).mean(),
+            })
+
+        # для day/week значения берутся на последний матч периода, value - среднее за период
+        timestamps = pd.to_datetime(df['match_timestamp'], utc=True)
+        matches_per_point = pd.Series(1, index=df.index)
+        frequency = self.resolutions[resolution]
+        if frequency:
+            periods = timestamps.dt.tz_localize(None).dt.to_period(frequency)
+            grouped_index = df.groupby(periods, sort=True).tail(1).index
+            matches_per_point = df.groupby(periods, sort=True).size().reset_index(drop=True)
+            for metric in metrics:
+                period_mean = df[metric].groupby(periods, sort=True).mean().reset_index(drop=True)
+                point_frame = series[metric].loc[grouped_index].reset_index(drop=True)
+                point_frame["value"] = period_mean
+                series[metric] = point_frame
+            timestamps = timestamps.loc[grouped_index].reset_index(drop=True)
+
+        def to_list(values):
+            return [round(float(value), 3) if pd.notna(value) else None for value in values]
+
+        return Response({
+            "player": {"id": target_player.id, "username": target_player.username, "rank": target_player.rank},
+            "game_name": game_name,
+            "window": window,
+            "span": span,
+            "resolution": resolution,
+            "matches_analyzed": int(len(df)),
+            "timestamps": [timestamp.isoformat() for timestamp in timestamps],
+            "matches": [int(count) for count in matches_per_point],
+            "metrics": {metric: {key: to_list(frame[key]) for key in ("value", "rolling", "ewma")}
+                        for metric, frame in series.items()},
+        }, status=status.HTTP_200_OK)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class StatsApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'stats_api'
+
+    def ready(self):
+        from . import signals  # noqa: F401
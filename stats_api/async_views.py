@@ -0,0 +1,120 @@
+import logging
+
+from django.http import JsonResponse
+from django.views import View
+
+from .models import Player, PlayerMatchStats, GameNames, Match, GameDataVersion
+from .serializers import PlayerSerializer, MatchSerializer, PlayerMatchStatsSerializer
+from .versioning import async_conditional_on_data_version
+
+logger_views = logging.getLogger(__name__)
+
+# Эндпоинты поиска на async ORM: под ASGI (uvicorn) запрос не занимает поток на время обращения к БД.
+# DRF не поддерживает async представления, поэтому это представления Django с теми же URL и ответами
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
+
+
+class AsyncLookupView(View):
+    http_method_names = ['get', 'options']
+
+    def lookup_params(self, request, *names):
+        """Значения обязательных параметров и game_name в нижнем регистре; None, если чего-то не хватает"""
+        values = [request.GET.get(name) for name in names]
+        game_name = request.GET.get('game_name', '').strip().lower()
+        if not all(values) or not game_name:
+            return None
+        return *values, game_name
+
+
+class PlayerByPuuidView(AsyncLookupView):
+    async def get(self, request, *args, **kwargs):
+        params = self.lookup_params(request, 'puuid')
+        if params is None:
+            return json_response({'error': 'Параметры puuid и game_name обязательны.'}, status=400)
+        puuid, game_name = params
+        try:
+            player = await Player.objects.puuid_iexact(puuid).aget(game_name=game_name)
+            return json_response(PlayerSerializer(player).data)
+        except Player.DoesNotExist:
+            return json_response({'detail': f'Игрок с PUUID {puuid} для игры {game_name} не найден.'}, status=404)
+        except Player.MultipleObjectsReturned:
+            logger_views.error(f"Найдено несколько игроков для puuid {puuid} и игры {game_name}")
+            return json_response({'detail': 'Найдено несколько игроков. Проблема целостности данных.'}, status=500)
+
+
+class PlayerByUsernameView(AsyncLookupView):
+    async def get(self, request, *args, **kwargs):
+        params = self.lookup_params(request, 'username')
+        if params is None:
+            return json_response({'error': 'Параметры username и game_name обязательны.'}, status=400)
+        username, game_name = params
+
+        # два первых игрока одним запросом: и ответ, и проверка неоднозначности
+        players = [player async for player in Player.objects.username_iexact(username).filter(game_name=game_name)[:2]]
+        if not players:
+            return json_response({'detail': f'Игрок с Username {username} для игры {game_name} не найден.'}, status=404)
+        if len(players) > 1:
+            logger_views.warning(
+                f"Найдено несколько игроков для username '{username}' и игры {game_name}. Возвращаем первого.")
+        return json_response(PlayerSerializer(players[0]).data)
+
+
+class MatchByGameMatchIdView(AsyncLookupView):
+    async def get(self, request, *args, **kwargs):
+        params = self.lookup_params(request, 'game_match_id')
+        if params is None:
+            return json_response({'error': 'Параметры game_match_id и game_name обязательны.'}, status=400)
+        game_match_id, game_name = params
+        try:
+            match = await Match.objects.game_match_id_iexact(game_match_id).aget(game_name=game_name)
+            return json_response(MatchSerializer(match).data)
+        except Match.DoesNotExist:
+            return json_response({'detail': f'Матч с ID {game_match_id} для игры {game_name} не найден.'}, status=404)
+        except Match.MultipleObjectsReturned:
+            logger_views.error(f"Найдено несколько матчей для game_match_id {game_match_id} и игры {game_name}")
+            return json_response({'detail': 'Найдено несколько матчей. Проблема целостности данных.'}, status=500)
+
+
+class PlayerMatchStatsByIdentifiersView(AsyncLookupView):
+    async def get(self, request, *args, **kwargs):
+        params = self.lookup_params(request, 'player_puuid', 'game_match_id')
+        if params is None:
+            return json_response({'error': 'Параметры player_puuid, game_match_id и game_name обязательны.'},
+                                 status=400)
+        player_puuid, game_match_id, game_name = params
+        try:
+            player = await Player.objects.puuid_iexact(player_puuid).aget(game_name=game_name)
+        except Player.DoesNotExist:
+            return json_response({'detail': f'Игрок с PUUID {player_puuid} (игра: {game_name}) не найден.'},
+                                 status=404)
+        try:
+            match = await Match.objects.game_match_id_iexact(game_match_id).aget(game_name=game_name)
+        except Match.DoesNotExist:
+            return json_response({'detail': f'Матч с ID {game_match_id} (игра: {game_name}) не найден.'}, status=404)
+        try:
+            # все связанные объекты загружаются сразу: сериализация не обращается к БД
+            stat_entry = await PlayerMatchStats.objects.select_related('player', 'match', 'valorant', 'pubg').aget(
+                player_id=player.id, match_id=match.id)
+            return json_response(PlayerMatchStatsSerializer(stat_entry).data)
+        except PlayerMatchStats.DoesNotExist:
+            return json_response({'detail': 'Статистика для данного игрока и матча не найдена.'}, status=404)
+        except PlayerMatchStats.MultipleObjectsReturned:
+            logger_views.error(f"Найдено несколько записей статистики для player_id {player.id} и match_id {match.id}")
+            return json_response({'detail': 'Найдено несколько записей статистики. Проблема целостности данных.'},
+                                 status=500)
+
+
+class AvailableGamesView(AsyncLookupView):
+    @async_conditional_on_data_version
+    async def get(self, request, *args, **kwargs):
+        # игры с данными берутся из реестра GameDataVersion (пополняется при записи), а не DISTINCT по таблицам
+        all_games_set = {g.lower() async for g in GameDataVersion.objects.values_list('game_name', flat=True) if g}
+        all_games_set.update(value.lower() for value, _ in GameNames.choices)
+
+        labels = {value.lower(): label for value, label in GameNames.choices}
+        game_options = [{'value': game_value, 'label': labels.get(game_value, game_value.capitalize())}
+                        for game_value in sorted(all_games_set)]
+        return json_response(game_options)
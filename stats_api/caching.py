@@ -0,0 +1,82 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+# Ответы кешируются под ключом, включающим поколение своей области: списка объектов игры или одного объекта.
+# Сброс области - новое поколение; старые записи больше не читаются и истекают по времени жизни
+ALL_GAMES = '*'
+
+
+def _generation_key(scope, value):
+    return f"api-cache-gen:{scope}:{value}"
+
+
+def _get_generation(scope, value):
+    key = _generation_key(scope, value)
+    generation = cache.get(key)
+    if generation is None:
+        # после вытеснения поколение начинается с текущего времени, а не с нуля - старые записи не оживают
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def _reset_generations(keys):
+    cache.set_many({key: time.time_ns() for key in keys}, timeout=None)
+
+
+def invalidate_cached_responses(scope, game_name, *pks):
+    """Сбрасывает закешированные списки игры и карточки объектов pks области scope после фиксации транзакции -
+    одним обращением к кешу на транзакцию. При откате транзакции кеш не меняется"""
+    keys = {_generation_key(scope, f"game:{ALL_GAMES}")}
+    keys.update(_generation_key(scope, pk) for pk in pks)
+    if game_name:
+        keys.add(_generation_key(scope, f"game:{game_name}"))
+
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        for entry in connection.run_on_commit:
+            pending_keys = getattr(entry[1], 'cache_generation_keys', None)
+            if pending_keys is not None:
+                pending_keys.update(keys)
+                return
+
+    def callback():
+        _reset_generations(callback.cache_generation_keys)
+
+    callback.cache_generation_keys = keys
+    transaction.on_commit(callback)
+
+
+def cached_response(scope):
+    """Кеширует данные успешного ответа list/retrieve представления в области scope:
+    список - по параметру game_name (без него - все игры), карточка - по pk из URL"""
+
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            if self.detail:
+                scope_value = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+            else:
+                scope_value = "game:" + (request.query_params.get('game_name', '').strip().lower() or ALL_GAMES)
+            generation = _get_generation(scope, scope_value)
+            # полный URL: ссылки пагинации в ответе содержат хост и параметры запроса
+            cache_key = "api-response:" + hashlib.md5(
+                f"{request.build_absolute_uri()}|{generation}".encode()).hexdigest()
+
+            data = cache.get(cache_key)
+            if data is not None:
+                return Response(data)
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(cache_key, response.data, settings.API_CACHE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
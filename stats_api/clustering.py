@@ -0,0 +1,176 @@
+import io
+
+import numpy as np
+from sklearn.cluster import DBSCAN, MiniBatchKMeans
+from sklearn.decomposition import PCA
+from sklearn.neighbors import KDTree
+from sklearn.preprocessing import StandardScaler
+
+CLUSTERING_BACKENDS = ("dbscan", "hdbscan", "minibatch_kmeans")
+
+
+def dump_array(array):
+    buffer = io.BytesIO()
+    np.save(buffer, np.asarray(array), allow_pickle=False)
+    return buffer.getvalue()
+
+
+def load_array(data):
+    return np.load(io.BytesIO(bytes(data)), allow_pickle=False)
+
+
+def stratified_sample_indices(X, sample_size, grid_size=10, random_state=42):
+    """Стратифицированная выборка ровно из sample_size точек: точки делятся на ячейки сетки в пространстве
+    признаков, квоты ячеек пропорциональны их размеру (метод наибольших остатков)"""
+    n_points = X.shape[0]
+    if not sample_size or sample_size >= n_points:
+        return np.arange(n_points)
+
+    rng = np.random.default_rng(random_state)
+    mins = X.min(axis=0)
+    spans = X.max(axis=0) - mins
+    spans[spans == 0] = 1.0
+    cells = np.minimum(((X - mins) / spans * grid_size).astype(int), grid_size - 1)
+
+    _, strata, counts = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+    strata = strata.reshape(-1)
+    shares = counts * sample_size / n_points
+    quotas = np.floor(shares).astype(int)
+    # оставшиеся точки - ячейкам с наибольшими дробными остатками, равные остатки - в случайном порядке
+    remaining = sample_size - quotas.sum()
+    if remaining:
+        by_remainder = np.lexsort((rng.random(len(counts)), -(shares - quotas)))
+        quotas[by_remainder[:remaining]] += 1
+
+    # случайный порядок внутри каждой ячейки, затем берем первые quota точек
+    order = np.lexsort((rng.random(n_points), strata))
+    sorted_strata = strata[order]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    rank_in_stratum = np.arange(n_points) - starts[sorted_strata]
+    return np.sort(order[rank_in_stratum < quotas[sorted_strata]])
+
+
+def hdbscan_exemplars(X, labels, probabilities, min_samples, max_per_cluster=50, random_state=42):
+    """Представители кластеров HDBSCAN: самые устойчивые точки кластера (максимальная вероятность
+    принадлежности), не больше max_per_cluster. Радиус представителя покрывает точки кластера, для которых
+    он ближайший, вместе с их core-расстоянием (до min_samples-го соседа) - как eps у DBSCAN"""
+    rng = np.random.default_rng(random_state)
+    core_distances = KDTree(X).query(X, k=min(min_samples, X.shape[0]))[0][:, -1]
+    exemplar_points, exemplar_labels, exemplar_radii = [], [], []
+    for cluster in np.unique(labels[labels != -1]):
+        members = np.flatnonzero(labels == cluster)
+        member_probabilities = probabilities[members]
+        candidates = members[member_probabilities >= member_probabilities.max()]
+        if len(candidates) > max_per_cluster:
+            candidates = np.sort(rng.choice(candidates, max_per_cluster, replace=False))
+        distances, nearest = KDTree(X[candidates]).query(X[members], k=1)
+        radii = np.zeros(len(candidates))
+        np.maximum.at(radii, nearest[:, 0], distances[:, 0] + core_distances[members])
+        exemplar_points.append(X[candidates])
+        exemplar_labels.append(np.full(len(candidates), cluster))
+        exemplar_radii.append(radii)
+
+    if not exemplar_points:
+        return np.empty((0, X.shape[1])), np.empty(0, dtype=int), np.empty(0)
+    return np.vstack(exemplar_points), np.concatenate(exemplar_labels), np.concatenate(exemplar_radii)
+
+
+def assign_to_nearest_core(X, core_points, core_labels, max_distance=None):
+    """Назначает каждой точке кластер ближайшей core-точки (KD-дерево).
+    Точки дальше max_distance от ближайшей core-точки считаются шумом (-1);
+    max_distance - общее расстояние (eps) или массив радиусов core-точек"""
+    labels = np.full(X.shape[0], -1, dtype=int)
+    if X.shape[0] == 0 or len(core_points) == 0:
+        return labels
+
+    tree = KDTree(np.asarray(core_points, dtype=float))
+    distances, indices = tree.query(X, k=1)
+    distances, indices = distances[:, 0], indices[:, 0]
+    labels = np.asarray(core_labels, dtype=int)[indices]
+    if max_distance is not None:
+        max_distance = np.asarray(max_distance, dtype=float)
+        labels[distances > (max_distance[indices] if max_distance.ndim else max_distance)] = -1
+    return labels
+
+
+def run_clustering(X_scaled, backend="dbscan", eps=0.3, min_samples=4, n_clusters=8,
+                   min_cluster_size=None, sample_size=None, random_state=42):
+    """Кластеризация масштабированных признаков выбранным бэкендом.
+
+    При sample_size меньше числа точек модель обучается на стратифицированной выборке,
+    остальные точки назначаются ближайшей core-точке. Вычисления однопоточные (n_jobs=1):
+    параллельность дает пул процессов аналитики"""
+    if backend not in CLUSTERING_BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд кластеризации '{backend}'. Доступны: {', '.join(CLUSTERING_BACKENDS)}")
+
+    n_points = X_scaled.shape[0]
+    sample_idx = None
+    X_fit = X_scaled
+    if sample_size and sample_size < n_points:
+        sample_idx = stratified_sample_indices(X_scaled, sample_size, random_state=random_state)
+        X_fit = X_scaled[sample_idx]
+
+    if backend == "dbscan":
+        model = DBSCAN(eps=eps, min_samples=min_samples, algorithm="kd_tree", n_jobs=1)
+        fit_labels = model.fit_predict(X_fit)
+        core_points = X_fit[model.core_sample_indices_]
+        core_labels = fit_labels[model.core_sample_indices_]
+        max_distance = eps
+    elif backend == "hdbscan":
+        try:
+            from sklearn.cluster import HDBSCAN
+        except ImportError:
+            raise ValueError("Бэкенд 'hdbscan' требует scikit-learn >= 1.3.")
+        model = HDBSCAN(min_cluster_size=min_cluster_size or max(min_samples, 5), min_samples=min_samples,
+                        algorithm="kd_tree", n_jobs=1, copy=True)
+        fit_labels = model.fit_predict(X_fit)
+        # не все точки кластеров, а представители с радиусами: модель компактна, дальние точки - шум
+        core_points, core_labels, max_distance = hdbscan_exemplars(
+            X_fit, fit_labels, model.probabilities_, min_samples, random_state=random_state)
+    else:
+        model = MiniBatchKMeans(n_clusters=min(n_clusters, X_fit.shape[0]), batch_size=4096, n_init=3,
+                                random_state=random_state)
+        fit_labels = model.fit_predict(X_fit)
+        core_points = model.cluster_centers_
+        core_labels = np.arange(core_points.shape[0])
+        max_distance = None
+
+    if sample_idx is None:
+        labels = fit_labels
+    else:
+        labels = assign_to_nearest_core(X_scaled, core_points, core_labels, max_distance)
+        labels[sample_idx] = fit_labels
+
+    return {
+        "labels": np.asarray(labels, dtype=int),
+        "core_points": core_points,
+        "core_labels": np.asarray(core_labels, dtype=int),
+        "max_distance": max_distance,
+        "sampled_points": int(X_fit.shape[0]) if sample_idx is not None else None,
+    }
+
+
+def fit_clustering(X, **clustering_params):
+    """Масштабирование, кластеризация (run_clustering) и проекция на плоскость для графика.
+    Не обращается к БД и Django - выполняется в пуле процессов аналитики"""
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    clustering_result = run_clustering(X_scaled, **clustering_params)
+
+    explained_variance = None
+    if X_scaled.shape[1] == 2:
+        xy = X_scaled
+    elif X_scaled.shape[1] == 1:
+        xy = np.column_stack([X_scaled[:, 0], np.zeros(X_scaled.shape[0])])
+    else:
+        pca = PCA(n_components=2)
+        xy = pca.fit_transform(X_scaled)
+        explained_variance = [round(float(r), 4) for r in pca.explained_variance_ratio_]
+
+    return {
+        **clustering_result,
+        "scaler_mean": scaler.mean_.tolist(),
+        "scaler_scale": scaler.scale_.tolist(),
+        "xy": xy,
+        "explained_variance": explained_variance,
+    }
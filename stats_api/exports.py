@@ -0,0 +1,143 @@
+import csv
+import io
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import PlayerMatchStats, stats_field_path
+
+# Колонки выгрузки: сначала раскладка stats_csv из CSVImportView (файл можно загрузить обратно),
+# затем контекст игрока и матча, который импорт игнорирует
+EXPORT_COLUMNS = [
+    ("player_puuid", "player__puuid"),
+    ("match_game_id", "match__game_match_id"),
+    ("won_match", "won_match"),
+    ("kills", "kills"),
+    ("deaths", "deaths"),
+    ("assists", "assists"),
+    ("kda", "kda"),
+    ("headshot_rate", "headshot_rate"),
+    ("damage_dealt", "damage_dealt"),
+    ("time_alive_seconds", "time_alive_seconds"),
+    # Valorant
+    ("skills_used", stats_field_path("skills_used")),
+    ("ultimates_used", stats_field_path("ultimates_used")),
+    ("bomb_plants", stats_field_path("bomb_plants")),
+    ("bomb_defuses", stats_field_path("bomb_defuses")),
+    ("headshots", stats_field_path("headshots")),
+    ("bodyshots", stats_field_path("bodyshots")),
+    ("legshots", stats_field_path("legshots")),
+    ("total_shots_hitted", stats_field_path("total_shots_hitted")),
+    ("total_shots_fired", stats_field_path("total_shots_fired")),
+    ("primary_weapon_used", stats_field_path("primary_weapon_used")),
+    ("armor_lvl1_purchases", stats_field_path("armor_lvl1_purchases")),
+    ("armor_lvl2_purchases", stats_field_path("armor_lvl2_purchases")),
+    # PUBG
+    ("boosts_used", stats_field_path("boosts_used")),
+    ("heals_used", stats_field_path("heals_used")),
+    ("revives", stats_field_path("revives")),
+    ("dbnos", stats_field_path("dbnos")),
+    ("longest_kill_distance", stats_field_path("longest_kill_distance")),
+    ("unique_abilities_used", "unique_abilities_used"),
+    # контекст
+    ("game_name", "game_name"),
+    ("username", "player__username"),
+    ("rank", "player__rank"),
+    ("match_timestamp", "match_timestamp"),
+    ("map_name", "map_name"),
+    ("game_mode", "match__game_mode"),
+    ("is_ranked", "is_ranked"),
+]
+EXPORT_HEADER = [name for name, _ in EXPORT_COLUMNS]
+EXPORT_SOURCES = [source for _, source in EXPORT_COLUMNS]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def iter_export_rows(queryset, chunk_size):
+    """Кортежи колонок выгрузки через серверный курсор: в памяти не больше chunk_size строк"""
+    return queryset.values_list(*EXPORT_SOURCES).iterator(chunk_size=chunk_size)
+
+
+class _Echo:
+    """Псевдо-файл для csv.writer: write возвращает строку вместо записи"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_ndjson(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(EXPORT_HEADER, row))) + "\n"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Приемник для ParquetWriter: записанные байты забираются после каждой группы строк"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema(pa):
+    """Схема Parquet по типам полей модели, чтобы пустые в первой группе колонки не определялись как null"""
+    types = {"BooleanField": pa.bool_(), "FloatField": pa.float64(), "CharField": pa.string(),
+             "DateTimeField": pa.timestamp("us", tz="UTC")}
+    fields = []
+    for name, source in EXPORT_COLUMNS:
+        model = PlayerMatchStats
+        *relations, field_name = source.split("__")
+        for relation in relations:
+            model = model._meta.get_field(relation).related_model
+        internal_type = model._meta.get_field(field_name).get_internal_type()
+        fields.append(pa.field(name, types.get(internal_type, pa.int64())))
+    return pa.schema(fields)
+
+
+def stream_parquet(rows, chunk_size):
+    """Parquet по группам строк размером chunk_size; pyarrow импортируется только для этого формата"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(pa)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            writer.write_table(pa.Table.from_pylist([dict(zip(EXPORT_HEADER, r)) for r in batch], schema=schema))
+            batch.clear()
+            yield sink.drain()
+    if batch:
+        writer.write_table(pa.Table.from_pylist([dict(zip(EXPORT_HEADER, r)) for r in batch], schema=schema))
+    writer.close()
+    yield sink.drain()
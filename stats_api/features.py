@@ -0,0 +1,83 @@
+from django.db.models import Avg, Count, F, FloatField, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import GameNames, stats_field, stats_field_path
+
+VALORANT = GameNames.VALORANT.value
+PUBG = GameNames.PUBG.value
+
+# Признаки игрока для кластеризации. Признаки с 'field' - среднее значение поля статистики за матч,
+# остальные вычисляются в pandas из агрегатов того же запроса. games=None - признак доступен для всех игр
+PLAYER_FEATURES = {
+    "combat_performance_score": {"label": "Combat Performance Score", "games": None},
+    "avg_unique_game_abilities": {"label": "Avg Unique Game Abilities", "games": None},
+    "avg_kills": {"label": "Avg Kills", "field": "kills", "games": None},
+    "avg_deaths": {"label": "Avg Deaths", "field": "deaths", "games": None},
+    "avg_assists": {"label": "Avg Assists", "field": "assists", "games": None},
+    "avg_kda": {"label": "Avg KDA", "field": "kda", "games": None},
+    "avg_headshot_rate": {"label": "Avg Headshot Rate", "field": "headshot_rate", "games": None},
+    "avg_damage_dealt": {"label": "Avg Damage Dealt", "field": "damage_dealt", "games": None},
+    # Valorant
+    "avg_bomb_plants": {"label": "Avg Bomb Plants", "field": "bomb_plants", "games": (VALORANT,)},
+    "avg_bomb_defuses": {"label": "Avg Bomb Defuses", "field": "bomb_defuses", "games": (VALORANT,)},
+    "avg_skills_used": {"label": "Avg Skills Used", "field": "skills_used", "games": (VALORANT,)},
+    "avg_ultimates_used": {"label": "Avg Ultimates Used", "field": "ultimates_used", "games": (VALORANT,)},
+    "shot_accuracy": {"label": "Shot Accuracy, %", "games": (VALORANT,)},
+    # PUBG
+    "avg_dbnos": {"label": "Avg DBNOs", "field": "dbnos", "games": (PUBG,)},
+    "avg_revives": {"label": "Avg Revives", "field": "revives", "games": (PUBG,)},
+    "avg_longest_kill_distance": {"label": "Avg Longest Kill", "field": "longest_kill_distance", "games": (PUBG,)},
+    "avg_boosts_used": {"label": "Avg Boosts Used", "field": "boosts_used", "games": (PUBG,)},
+    "avg_heals_used": {"label": "Avg Heals Used", "field": "heals_used", "games": (PUBG,)},
+}
+
+DEFAULT_FEATURES = ("combat_performance_score", "avg_unique_game_abilities")
+
+
+def features_for_game(game_name):
+    return [name for name, spec in PLAYER_FEATURES.items() if spec["games"] is None or game_name in spec["games"]]
+
+
+def _avg_of(field_name):
+    is_float = stats_field(field_name).get_internal_type() == "FloatField"
+    return Avg(Coalesce(F(stats_field_path(field_name)), Value(0.0 if is_float else 0)), output_field=FloatField())
+
+
+def _sum_of(field_name):
+    return Sum(Coalesce(F(stats_field_path(field_name)), Value(0)))
+
+
+def player_feature_aggregates(game_name):
+    """Агрегаты для всех признаков игры: вычисляются одним GROUP BY по игроку"""
+    aggregates = {"num_matches": Count("id")}
+    for name in features_for_game(game_name):
+        field_name = PLAYER_FEATURES[name].get("field")
+        if field_name:
+            aggregates[name] = _avg_of(field_name)
+
+    aggregates["avg_direct_unique_abilities"] = _avg_of("unique_abilities_used")
+    if game_name == VALORANT:
+        aggregates.update({
+            "sum_skills_used": _sum_of("skills_used"),
+            "sum_ultimates_used": _sum_of("ultimates_used"),
+            "sum_shots_hitted": _sum_of("total_shots_hitted"),
+            "sum_shots_fired": _sum_of("total_shots_fired"),
+        })
+    elif game_name == PUBG:
+        aggregates.update({
+            "sum_heals_used": _sum_of("heals_used"),
+            "sum_boosts_used": _sum_of("boosts_used"),
+        })
+    return aggregates
+
+
+# Метрики матча, по которым игрок сравнивается с группой своего или выбранного ранга
+COMPARISON_METRICS = {
+    None: ["kills", "deaths", "assists", "kda", "damage_dealt", "headshot_rate"],
+    VALORANT: ["skills_used", "ultimates_used"],
+    PUBG: ["boosts_used", "heals_used"],
+}
+
+
+def comparison_metrics(game_name):
+    return COMPARISON_METRICS[None] + COMPARISON_METRICS.get(game_name, [])
@@ -0,0 +1,80 @@
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from django.conf import settings
+
+logger_jobs = logging.getLogger(__name__)
+
+# Пул процессов для тяжелых вычислений аналитики: веб-процесс только ждет результат и не держит GIL.
+# Создается при первой задаче, один на процесс веб-сервера
+_executor = None
+_in_flight = {}
+_lock = threading.RLock()
+
+
+class AnalyticsJobTimeout(Exception):
+    """Задача не завершилась за ANALYTICS_JOB_TIMEOUT; она продолжает выполняться,
+    и повторный запрос с теми же данными дождется ее результата"""
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.ANALYTICS_POOL_SIZE,
+            mp_context=multiprocessing.get_context(settings.ANALYTICS_POOL_START_METHOD))
+    return _executor
+
+
+def _reset_executor(executor):
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+            _in_flight.clear()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _forget(key, future):
+    with _lock:
+        if _in_flight.get(key) is future:
+            del _in_flight[key]
+
+
+def analytics_job_key(name, X, params):
+    """Ключ задачи по входным точкам и параметрам: одинаковые задачи выполняются один раз"""
+    digest = hashlib.md5(np.ascontiguousarray(X).tobytes())
+    digest.update(f"{name}|{X.shape}|{sorted(params.items())}".encode())
+    return digest.hexdigest()
+
+
+def run_analytics_job(key, func, *args, **kwargs):
+    """Выполняет func(*args, **kwargs) в пуле процессов аналитики и возвращает результат.
+    Пока задача с тем же key выполняется, новые запросы ждут ее, а не запускают повторно.
+    ANALYTICS_POOL_SIZE=0 - выполнение в текущем процессе"""
+    if not settings.ANALYTICS_POOL_SIZE:
+        return func(*args, **kwargs)
+
+    with _lock:
+        executor = _get_executor()
+        future = _in_flight.get(key)
+        if future is None:
+            future = executor.submit(func, *args, **kwargs)
+            _in_flight[key] = future
+            future.add_done_callback(lambda done: _forget(key, done))
+
+    try:
+        return future.result(timeout=settings.ANALYTICS_JOB_TIMEOUT or None)
+    except FutureTimeoutError:
+        raise AnalyticsJobTimeout(
+            f"Вычисление не завершилось за {settings.ANALYTICS_JOB_TIMEOUT} с и продолжается. Повторите запрос позже.")
+    except BrokenProcessPool:
+        # процесс пула аварийно завершился (например, по памяти) - следующая задача создаст новый пул
+        logger_jobs.error(f"Пул процессов аналитики остановлен аварийно, задача {key} не выполнена")
+        _reset_executor(executor)
+        raise
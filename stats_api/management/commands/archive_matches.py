@@ -0,0 +1,106 @@
+import logging
+from datetime import datetime, time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from stats_api.caching import invalidate_cached_responses
+from stats_api.exports import EXPORT_FORMATS, iter_export_rows, stream_csv, stream_ndjson, stream_parquet
+from stats_api.models import GAME_STATS_MODELS, GameNames, Match, PlayerMatchStats
+from stats_api.versioning import bump_data_version
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = ("Архивирует старый сезон: выгружает статистику матчей до указанной даты в файл "
+            "и удаляет эти матчи пачками")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--before", type=str, required=True, help="Архивировать матчи раньше даты (YYYY-MM-DD)")
+        parser.add_argument("--game_name", type=str, help="Архивировать только указанную игру")
+        parser.add_argument("--output", type=str, help="Файл выгрузки; для нескольких игр к имени добавляется игра. "
+                                                         "Обязателен для удаления, если не указан --delete-without-archive")
+        parser.add_argument("--file_format", type=str, default="parquet", choices=list(EXPORT_FORMATS))
+        parser.add_argument("--batch_size", type=int, default=5000, help="Матчей за одну транзакцию удаления")
+        parser.add_argument("--no-delete", action="store_true", help="Только выгрузить, не удалять")
+        parser.add_argument("--delete-without-archive", action="store_true",
+                            help="Удалить матчи без выгрузки в файл (данные будут потеряны)")
+        parser.add_argument("--dry-run", action="store_true", help="Только показать объем архива")
+
+    def handle(self, *args, **options):
+        before = parse_datetime(options["before"]) or (
+            datetime.combine(parse_date(options["before"]), time.min) if parse_date(options["before"]) else None)
+        if before is None:
+            raise CommandError("Некорректная дата в --before.")
+        if timezone.is_naive(before):
+            before = timezone.make_aware(before)
+        if not options["output"] and not options["dry_run"] and (
+                options["no_delete"] or not options["delete_without_archive"]):
+            raise CommandError("Укажите --output для выгрузки архива "
+                               "или --delete-without-archive, чтобы удалить матчи без выгрузки.")
+
+        game_names = [options["game_name"]] if options["game_name"] else [value for value, _ in GameNames.choices]
+        for game_name in game_names:
+            matches_qs = Match.objects.filter(game_name=game_name, match_timestamp__lt=before)
+            stats_qs = PlayerMatchStats.objects.filter(game_name=game_name, match__in=matches_qs)
+            matches_count, stats_count = matches_qs.count(), stats_qs.count()
+            self.stdout.write(f"{game_name}: матчей {matches_count}, строк статистики {stats_count} до {before:%Y-%m-%d}")
+            if options["dry_run"] or not matches_count:
+                continue
+
+            if options["output"]:
+                self.export(stats_qs.order_by("match_timestamp", "id"), game_name, options, len(game_names) > 1)
+            if not options["no_delete"]:
+                self.delete_in_batches(matches_qs, game_name, options["batch_size"])
+
+    def export(self, stats_qs, game_name, options, add_game_suffix):
+        path = options["output"]
+        if add_game_suffix:
+            stem, dot, extension = path.rpartition(".")
+            path = f"{stem}_{game_name}.{extension}" if dot else f"{path}_{game_name}"
+        file_format = options["file_format"]
+        chunk_size = settings.EXPORT_CHUNK_SIZE
+        rows = iter_export_rows(stats_qs, chunk_size)
+        if file_format == "csv":
+            content = stream_csv(rows)
+        elif file_format == "ndjson":
+            content = stream_ndjson(rows)
+        else:
+            content = stream_parquet(rows, chunk_size)
+
+        with open(path, "wb") as output_file:
+            for chunk in content:
+                output_file.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        logger.info(f"Архив '{game_name}' записан в {path}")
+        self.stdout.write(f"{game_name}: выгружено в {path}")
+
+    def delete_in_batches(self, matches_qs, game_name, batch_size):
+        """Удаление без загрузки объектов в память: таблицы-расширения статистики, статистика и матчи удаляются
+        прямыми DELETE по пачкам id (каскад ORM здесь не работает). Сигналы строк не отправляются,
+        версия данных игры и кеш ответов API сбрасываются один раз на пачку"""
+        extension_tables = [connection.ops.quote_name(model._meta.db_table) for model in GAME_STATS_MODELS.values()]
+        stats_table = connection.ops.quote_name(PlayerMatchStats._meta.db_table)
+        matches_table = connection.ops.quote_name(Match._meta.db_table)
+        deleted_matches = 0
+        while True:
+            match_ids = list(matches_qs.order_by("id").values_list("id", flat=True)[:batch_size])
+            if not match_ids:
+                break
+            placeholders = ", ".join(["%s"] * len(match_ids))
+            with transaction.atomic(), connection.cursor() as cursor:
+                for extension_table in extension_tables:
+                    cursor.execute(f"DELETE FROM {extension_table} WHERE stats_id IN "
+                                   f"(SELECT id FROM {stats_table} WHERE match_id IN ({placeholders}))", match_ids)
+                cursor.execute(f"DELETE FROM {stats_table} WHERE match_id IN ({placeholders})", match_ids)
+                cursor.execute(f"DELETE FROM {matches_table} WHERE id IN ({placeholders})", match_ids)
+                bump_data_version(game_name)
+                # сигналы не отправляются - закешированные ответы API сбрасываются явно
+                invalidate_cached_responses('match', game_name, *match_ids)
+                invalidate_cached_responses('player', game_name)
+            deleted_matches += len(match_ids)
+            self.stdout.write(f"{game_name}: удалено матчей {deleted_matches}")
+        logger.info(f"Архивация '{game_name}' завершена: удалено матчей {deleted_matches}")
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from stats_api.analytics_views import build_dbscan_scatter_points, group_records_by_cluster
+
+
+def make_synthetic_analysis_frame(n_players, n_clusters=6, random_state=42):
+    """DataFrame той же структуры, что возвращает DBSCAN анализ, со случайными значениями"""
+    rng = np.random.default_rng(random_state)
+    return pd.DataFrame({
+        "player_id": np.arange(1, n_players + 1),
+        "player__username": [f"player_{i}" for i in range(n_players)],
+        "player__puuid": [f"puuid-{i}" for i in range(n_players)],
+        "num_matches": rng.integers(5, 200, n_players),
+        "avg_kills": rng.random(n_players) * 30,
+        "avg_deaths": rng.random(n_players) * 20,
+        "avg_assists": rng.random(n_players) * 10,
+        "avg_kda": rng.random(n_players) * 4,
+        "avg_headshot_rate": rng.random(n_players) * 100,
+        "avg_damage_dealt": rng.random(n_players) * 3000,
+        "avg_unique_game_abilities": rng.random(n_players) * 15,
+        "combat_performance_score": rng.random(n_players) * 5,
+        "x": rng.normal(size=n_players),
+        "y": rng.normal(size=n_players),
+        "cluster": rng.integers(-1, n_clusters, n_players),
+    })
+
+
+class Command(BaseCommand):
+    help = "Микробенчмарк сборки ответа DBSCAN анализа (стоимость на одного игрока)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                            help="Количество игроков в синтетических наборах")
+        parser.add_argument("--repeat", type=int, default=3, help="Количество повторов, берется лучшее время")
+
+    def handle(self, *args, **options):
+        for n_players in options["sizes"]:
+            df = make_synthetic_analysis_frame(n_players)
+            best = float("inf")
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                group_records_by_cluster(df, "valorant")
+                build_dbscan_scatter_points(df)
+                best = min(best, time.perf_counter() - started)
+            self.stdout.write(
+                f"{n_players:>9} игроков: {best:.3f} с всего, {best / n_players * 1e6:.2f} мкс на игрока")
@@ -0,0 +1,95 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import RequestFactory
+from django.urls import resolve
+
+from stats_api.models import PlayerMatchStats
+
+# Режимы соединений: новое соединение на запрос, постоянное соединение, пул psycopg
+CONNECTION_MODES = {
+    "new": {"CONN_MAX_AGE": 0, "pool": False},
+    "persistent": {"CONN_MAX_AGE": None, "pool": False},
+    "pool": {"CONN_MAX_AGE": 0, "pool": True},
+}
+
+
+@contextmanager
+def connection_mode(mode):
+    """Временно переключает параметры соединения default; запросы открывают соединения по новым параметрам"""
+    settings_dict = connection.settings_dict
+    saved = settings_dict["CONN_MAX_AGE"], settings_dict["OPTIONS"]
+    options = {key: value for key, value in saved[1].items() if key != "pool"}
+    if CONNECTION_MODES[mode]["pool"]:
+        options["pool"] = saved[1].get("pool") or True
+    connection.close()
+    settings_dict["CONN_MAX_AGE"] = CONNECTION_MODES[mode]["CONN_MAX_AGE"]
+    settings_dict["OPTIONS"] = options
+    try:
+        yield
+    finally:
+        connection.close()
+        if CONNECTION_MODES[mode]["pool"]:
+            connection.close_pool()
+        settings_dict["CONN_MAX_AGE"], settings_dict["OPTIONS"] = saved
+
+
+class Command(BaseCommand):
+    help = "Задержка эндпоинтов поиска (by_puuid, by_username, by_game_match_id, by_identifiers) при разных режимах соединений с БД"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game_name", type=str, default="valorant", help="Игра, из данных которой берутся запросы")
+        parser.add_argument("--requests", type=int, default=200, help="Количество запросов к каждому эндпоинту")
+        parser.add_argument("--modes", nargs="+", choices=list(CONNECTION_MODES), default=["new", "persistent"],
+                            help="Режимы соединений; pool - только PostgreSQL с пакетом psycopg[pool]")
+
+    def lookup_urls(self, game_name):
+        stats = PlayerMatchStats.objects.filter(game_name=game_name).select_related("player", "match").first()
+        if stats is None or not stats.player.puuid or not stats.match.game_match_id:
+            raise CommandError(f"Нет статистики игры '{game_name}' с PUUID игрока и ID матча.")
+        player, match = stats.player, stats.match
+        return {
+            "by_puuid": f"/api/players/by_puuid/?puuid={player.puuid}&game_name={game_name}",
+            "by_username": f"/api/players/by_username/?username={player.username}&game_name={game_name}",
+            "by_game_match_id": f"/api/matches/by_game_match_id/?game_match_id={match.game_match_id}&game_name={game_name}",
+            "by_identifiers": f"/api/player-match-stats/by_identifiers/?player_puuid={player.puuid}"
+                              f"&game_match_id={match.game_match_id}&game_name={game_name}",
+        }
+
+    def measure(self, url, count):
+        """Времена запросов в мс; начало и конец запроса обрабатывают соединения так же, как обработчик WSGI/ASGI"""
+        factory = RequestFactory()
+        view = resolve(url.split("?")[0])
+        # async представления выполняются в этом же потоке, как под WSGI
+        view_func = async_to_sync(view.func) if iscoroutinefunction(view.func) else view.func
+        timings = []
+        for _ in range(count):
+            request = factory.get(url)
+            started = time.perf_counter()
+            close_old_connections()
+            response = view_func(request, *view.args, **view.kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            close_old_connections()
+            timings.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f"{url}: статус {response.status_code}")
+        return timings
+
+    def handle(self, *args, **options):
+        if "pool" in options["modes"] and connection.vendor != "postgresql":
+            raise CommandError("Пул соединений поддерживается только для PostgreSQL.")
+        urls = self.lookup_urls(options["game_name"])
+
+        for mode in options["modes"]:
+            self.stdout.write(f"Режим '{mode}':")
+            with connection_mode(mode):
+                for name, url in urls.items():
+                    timings = sorted(self.measure(url, options["requests"]))
+                    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                    self.stdout.write(f"  {name:<17} медиана {statistics.median(timings):7.2f} мс, p95 {p95:7.2f} мс")
@@ -0,0 +1,55 @@
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Код дочернего процесса: время от начала настройки Django и пиковая память (RSS, МБ) после импортов сценария
+CHILD_CODE = """
+import resource, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+{imports}
+elapsed = time.perf_counter() - started
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024))
+"""
+
+# Сценарии запуска: настройка Django; процесс веб-сервера после загрузки URL (эндпоинты поиска и списки);
+# тот же процесс после первого запроса к аналитике, загрузившего pandas/scikit-learn
+SCENARIOS = {
+    "django_setup": "",
+    "urls": "import importlib; from django.conf import settings; importlib.import_module(settings.ROOT_URLCONF)",
+    "urls_analytics": "import importlib; from django.conf import settings; importlib.import_module(settings.ROOT_URLCONF)\n"
+                      "import stats_api.analytics_views",
+}
+
+
+class Command(BaseCommand):
+    help = "Время запуска и пиковая память (RSS) процесса для разных наборов импортов (каждый запуск - новый процесс)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5, help="Количество запусков каждого сценария")
+        parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS),
+                            help="Сценарии запуска")
+
+    def run_child(self, imports):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+               "PYTHONPATH": os.pathsep.join(path for path in sys.path if path)}
+        result = subprocess.run([sys.executable, "-c", CHILD_CODE.format(imports=imports)], env=env,
+                                cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise CommandError(f"Дочерний процесс завершился с ошибкой:\n{result.stderr}")
+        # последняя строка - замеры; выше может быть вывод настроек
+        elapsed, max_rss = map(float, result.stdout.strip().splitlines()[-1].split())
+        return elapsed, max_rss
+
+    def handle(self, *args, **options):
+        for scenario in options["scenarios"]:
+            runs = [self.run_child(SCENARIOS[scenario]) for _ in range(options["repeat"])]
+            elapsed = statistics.median(run[0] for run in runs)
+            max_rss = statistics.median(run[1] for run in runs)
+            self.stdout.write(f"{scenario:<15} запуск {elapsed * 1000:8.1f} мс, RSS {max_rss:7.1f} МБ")
@@ -0,0 +1,73 @@
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+
+from stats_api.features import player_feature_aggregates
+from stats_api.models import GameNames, Match, Player, PlayerMatchStats
+
+logger = logging.getLogger(__name__)
+
+INDEX_SCAN_NODES = ("Index Scan", "Index Only Scan", "Bitmap Index Scan")
+
+
+def hot_queries(game_name):
+    """Запросы, повторяющие пути доступа представлений; используются командой и тестами планов"""
+    player = Player.objects.filter(game_name=game_name).exclude(rank__isnull=True).first()
+    match = Match.objects.filter(game_name=game_name).exclude(game_match_id__isnull=True).first()
+    if player is None or match is None:
+        raise CommandError(f"Нет данных игры '{game_name}' для построения запросов.")
+
+    return {
+        "dbscan_player_aggregates": PlayerMatchStats.objects.filter(game_name=game_name)
+        .values("player").annotate(**player_feature_aggregates(game_name)).order_by(),
+        "match_history_page": PlayerMatchStats.objects.filter(player=player)
+        .order_by(F("match_timestamp").desc(nulls_last=True), "-id")[:10],
+        "comparison_last_matches": PlayerMatchStats.objects.filter(player=player)
+        .order_by(F("match_timestamp").desc(nulls_last=True), "-id")[:20],
+        "rank_group_stats": PlayerMatchStats.objects.filter(game_name=game_name, player__rank=player.rank),
+        "rank_players": Player.objects.filter(game_name=game_name, rank=player.rank),
+        "player_by_puuid": Player.objects.puuid_iexact(player.puuid).filter(game_name=game_name),
+        "match_by_game_match_id": Match.objects.game_match_id_iexact(match.game_match_id).filter(game_name=game_name),
+        "match_list_page": Match.objects.filter(game_name=game_name)
+        .order_by(F("match_timestamp").desc(nulls_last=True), "-id")[:10],
+    }
+
+
+class Command(BaseCommand):
+    help = "Проверяет через EXPLAIN, что основные запросы API используют индексы (только PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game_name", type=str, default=GameNames.VALORANT.value)
+        parser.add_argument("--force-index", action="store_true",
+                            help="Отключить seq scan (enable_seqscan = off): проверить, что индекс применим, "
+                                 "даже если на маленькой таблице планировщик выбирает полный просмотр")
+        parser.add_argument("--strict", action="store_true", help="Завершиться с ошибкой, если есть запрос без индекса")
+        parser.add_argument("--verbose-plans", action="store_true", help="Печатать планы целиком")
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write(f"Проверка планов поддерживается только для PostgreSQL (текущая БД: {connection.vendor}).")
+            return
+
+        failed = []
+        with transaction.atomic():
+            if options["force_index"]:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset in hot_queries(options["game_name"]).items():
+                plan = queryset.explain()
+                uses_index = any(node in plan for node in INDEX_SCAN_NODES)
+                status = "index" if uses_index else "SEQ SCAN"
+                self.stdout.write(f"{name:<28} {status}")
+                if options["verbose_plans"] or not uses_index:
+                    self.stdout.write(plan)
+                if not uses_index:
+                    failed.append(name)
+
+        if failed:
+            logger.warning(f"Запросы без индекса: {', '.join(failed)}")
+            if options["strict"]:
+                raise CommandError(f"Запросы без индекса: {', '.join(failed)}")
@@ -7,6 +7,7 @@ import random
 from datetime import datetime, timezone
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from django.utils.dateparse import parse_datetime
 
 from dotenv import load_dotenv
@@ -334,108 +335,110 @@ class Command(BaseCommand):
                     timezone.utc)
                 duration = match_attributes_player_history.get("duration", 0)
 
-                match_obj_db, match_created_in_db = Match.objects.update_or_create(
-                    game_match_id=match_id_from_player_history, game_name=GameNames.PUBG,
-                    defaults={
-                        "match_timestamp": match_timestamp, "duration_seconds": duration,
-                        "map_name": match_attributes_player_history.get("mapName"),
-                        "game_mode": game_mode_api_player_history,
-                        "is_ranked": True,
-                    }
-                )
+                # строки одного матча фиксируются вместе: версия данных игры увеличивается один раз на матч
+                with transaction.atomic():
+                    match_obj_db, match_created_in_db = Match.objects.update_or_create(
+                        game_match_id=match_id_from_player_history, game_name=GameNames.PUBG,
+                        defaults={
+                            "match_timestamp": match_timestamp, "duration_seconds": duration,
+                            "map_name": match_attributes_player_history.get("mapName"),
+                            "game_mode": game_mode_api_player_history,
+                            "is_ranked": True,
+                        }
+                    )
 
-                is_new_match_for_session = match_id_from_player_history not in processed_match_ids_in_session
+                    is_new_match_for_session = match_id_from_player_history not in processed_match_ids_in_session
 
-                if is_new_match_for_session:
-                    if match_created_in_db:
-                        logger.info(
-                            f"Подходящий Матч PUBG {match_id_from_player_history} ({match_obj_db.map_name}) добавлен в БД")
-
-                participants_api_data = [item for item in included_data_player_history if
-                                         item and item.get("type") == "participant"]
-                rosters_api_data = [item for item in included_data_player_history if
-                                    item and item.get("type") == "roster"]
-
-                if not participants_api_data:
-                    logger.warning(f"В матче {match_id_from_player_history} отсутствуют данные участников")
                     if is_new_match_for_session:
-                        processed_match_ids_in_session.add(match_id_from_player_history)
-                        continue
-
-                roster_win_map = {}
-                if rosters_api_data:
-                    for roster_item in rosters_api_data:
-                        roster_id = roster_item.get("id")
-                        if not roster_id:
+                        if match_created_in_db:
+                            logger.info(
+                                f"Подходящий Матч PUBG {match_id_from_player_history} ({match_obj_db.map_name}) добавлен в БД")
+
+                    participants_api_data = [item for item in included_data_player_history if
+                                             item and item.get("type") == "participant"]
+                    rosters_api_data = [item for item in included_data_player_history if
+                                        item and item.get("type") == "roster"]
+
+                    if not participants_api_data:
+                        logger.warning(f"В матче {match_id_from_player_history} отсутствуют данные участников")
+                        if is_new_match_for_session:
+                            processed_match_ids_in_session.add(match_id_from_player_history)
                             continue
 
-                        r_stats = roster_item.get("attributes", {}).get("stats", {})
-                        rank_val = r_stats.get("rank")
-
-                        try:
-                            rank_int = int(rank_val) if rank_val is not None else 99
-                        except ValueError:
-                            rank_int = 99
-
-                        roster_win_map[roster_id] = (rank_int == 1)
-
-                for participant_item in participants_api_data:
-                    p_stats = participant_item.get("attributes", {}).get("stats", {})
-                    actor_account_id_loop = p_stats.get("playerId")
-
-                    if actor_account_id_loop == player_account_id_to_process:
-                        logger.debug(
-                            f"Сбор статистики для целевого игрока: {start_player_obj.username} ({actor_account_id_loop}) в матче {match_id_from_player_history}")
-
-                        kills = p_stats.get("kills", 0)
-                        assists = p_stats.get("assists", 0)
-                        death_type = p_stats.get("deathType", "")
-                        deaths = 1 if death_type and death_type.lower() not in ["", "alive"] else 0
-                        headshot_kills = p_stats.get("headshotKills", 0)
-                        hs_rate = (headshot_kills / kills) * 100 if kills > 0 else 0.0
-                        boosts_used = p_stats.get("boosts", 0)
-                        heals_used = p_stats.get("heals", 0)
-                        kda_val = (kills + assists) / deaths if deaths > 0 else (kills + assists)
-
-                        won_match = False
-                        participant_api_id_loop = participant_item.get("id")
-                        if rosters_api_data:
-                            for roster_item_loop in rosters_api_data:
-                                if not roster_item_loop:
-                                    continue
-
-                                roster_id_loop = roster_item_loop.get("id")
-                                for p_ref_loop in roster_item_loop.get("relationships", {}).get("participants", {}).get(
-                                        "data", []):
-                                    if p_ref_loop and p_ref_loop.get("id") == participant_api_id_loop:
-                                        won_match = roster_win_map.get(roster_id_loop, False)
-                                        break
-
-                                if roster_id_loop and roster_id_loop in roster_win_map:
-                                    if participant_api_id_loop in [p_l["id"] for p_l in
-                                                                   roster_item_loop.get("relationships", {}).get(
-                                                                       "participants", {}).get("data", []) if p_l]:
-                                        break
-
-                        stat_obj, stat_created = PlayerMatchStats.objects.update_or_create(
-                            player=start_player_obj,
-                            match=match_obj_db,
-                            defaults={
-                                "game_name": GameNames.PUBG, "won_match": won_match,
-                                "kills": kills, "deaths": deaths, "assists": assists,
-                                "kda": round(kda_val, 2), "headshot_rate": round(hs_rate, 1),
-                                "damage_dealt": round(p_stats.get("damageDealt", 0.0), 1),
-                                "boosts_used": boosts_used, "heals_used": heals_used,
-                                "revives": p_stats.get("revives", 0), "dbnos": p_stats.get("DBNOs", 0),
-                                "time_alive_seconds": int(p_stats.get("timeSurvived", 0)),
-                                "longest_kill_distance": round(p_stats.get("longestKill", 0.0), 1)
-                            }
-                        )
-
-                        if stat_created:
-                            total_player_match_stats_saved_this_session += 1
-
-                        break
+                    roster_win_map = {}
+                    if rosters_api_data:
+                        for roster_item in rosters_api_data:
+                            roster_id = roster_item.get("id")
+                            if not roster_id:
+                                continue
+
+                            r_stats = roster_item.get("attributes", {}).get("stats", {})
+                            rank_val = r_stats.get("rank")
+
+                            try:
+                                rank_int = int(rank_val) if rank_val is not None else 99
+                            except ValueError:
+                                rank_int = 99
+
+                            roster_win_map[roster_id] = (rank_int == 1)
+
+                    for participant_item in participants_api_data:
+                        p_stats = participant_item.get("attributes", {}).get("stats", {})
+                        actor_account_id_loop = p_stats.get("playerId")
+
+                        if actor_account_id_loop == player_account_id_to_process:
+                            logger.debug(
+                                f"Сбор статистики для целевого игрока: {start_player_obj.username} ({actor_account_id_loop}) в матче {match_id_from_player_history}")
+
+                            kills = p_stats.get("kills", 0)
+                            assists = p_stats.get("assists", 0)
+                            death_type = p_stats.get("deathType", "")
+                            deaths = 1 if death_type and death_type.lower() not in ["", "alive"] else 0
+                            headshot_kills = p_stats.get("headshotKills", 0)
+                            hs_rate = (headshot_kills / kills) * 100 if kills > 0 else 0.0
+                            boosts_used = p_stats.get("boosts", 0)
+                            heals_used = p_stats.get("heals", 0)
+                            kda_val = (kills + assists) / deaths if deaths > 0 else (kills + assists)
+
+                            won_match = False
+                            participant_api_id_loop = participant_item.get("id")
+                            if rosters_api_data:
+                                for roster_item_loop in rosters_api_data:
+                                    if not roster_item_loop:
+                                        continue
+
+                                    roster_id_loop = roster_item_loop.get("id")
+                                    for p_ref_loop in roster_item_loop.get("relationships", {}).get("participants", {}).get(
+                                            "data", []):
+                                        if p_ref_loop and p_ref_loop.get("id") == participant_api_id_loop:
+                                            won_match = roster_win_map.get(roster_id_loop, False)
+                                            break
+
+                                    if roster_id_loop and roster_id_loop in roster_win_map:
+                                        if participant_api_id_loop in [p_l["id"] for p_l in
+                                                                       roster_item_loop.get("relationships", {}).get(
+                                                                           "participants", {}).get("data", []) if p_l]:
+                                            break
+
+                            stat_obj, stat_created = PlayerMatchStats.objects.update_or_create_with_game_stats(
+                                player=start_player_obj,
+                                match=match_obj_db,
+                                defaults={
+                                    "game_name": GameNames.PUBG, "won_match": won_match,
+                                    "kills": kills, "deaths": deaths, "assists": assists,
+                                    "kda": round(kda_val, 2), "headshot_rate": round(hs_rate, 1),
+                                    "damage_dealt": round(p_stats.get("damageDealt", 0.0), 1),
+                                    "boosts_used": boosts_used, "heals_used": heals_used,
+                                    "revives": p_stats.get("revives", 0), "dbnos": p_stats.get("DBNOs", 0),
+                                    "time_alive_seconds": int(p_stats.get("timeSurvived", 0)),
+                                    "longest_kill_distance": round(p_stats.get("longestKill", 0.0), 1)
+                                }
+                            )
+
+                            if stat_created:
+                                total_player_match_stats_saved_this_session += 1
+
+                            break
 
                 if is_new_match_for_session:
                     processed_match_ids_in_session.add(match_id_from_player_history)
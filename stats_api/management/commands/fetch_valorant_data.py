@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 from collections import deque, defaultdict, Counter
 
 from django.core.management.base import BaseCommand
+from django.db import transaction
 
 from dotenv import load_dotenv
 
@@ -287,162 +288,164 @@ class Command(BaseCommand):
                 game_mode = metadata.get("mode", {})
                 is_ranked_flag = metadata.get("mode_id", {}) == "competitive"
 
-                match_obj, match_created = Match.objects.update_or_create(
-                    game_name=GameNames.VALORANT,
-                    game_match_id=match_id,
-                    defaults={
-                        "match_timestamp": match_datetime_str,
-                        "duration_seconds": game_lenght,
-                        "map_name": map_name,
-                        "rounds_played": rounds_played,
-                        "game_mode": game_mode,
-                        "is_ranked": is_ranked_flag,
-                    }
-                )
-
-                action_match = "добавлен" if match_created else "обновлен"
-                logger.info(f"Матч {match_id} ({map_name}) {action_match}")
-
-                plants_by_puuid = defaultdict(int)
-                defuses_by_puuid = defaultdict(int)
-                weapon_usage_by_puuid = defaultdict(list)
-
-                for round_data in rounds_info:
-                    plant_info = round_data.get("plant_events", {})
-                    defuse_info = round_data.get("defuse_events", {})
-                    if plant_info:
-                        if plant_info["planted_by"] is not None:
-                            planter_puuid = plant_info["planted_by"].get("puuid")
-                            if planter_puuid:
-                                plants_by_puuid[planter_puuid] += 1
-                    if defuse_info:
-                        if defuse_info["defused_by"] is not None:
-                            defuser_puuid = defuse_info["defused_by"].get("puuid")
-                            if defuser_puuid:
-                                defuses_by_puuid[defuser_puuid] += 1
-
-                    for player_round_stats in round_data.get("player_stats", []):
-                        puuid = player_round_stats.get("player_puuid")
-                        if not puuid:
-                            continue
-
-                        economy_data = player_round_stats.get("economy", {})
-                        if not economy_data:
-                            continue
-
-                        weapon_data = economy_data.get("weapon")
-                        if weapon_data and weapon_data.get("name"):
-                            weapon_name = weapon_data["name"]
-
-                            # Исключаем стартовое оружие
-                            if weapon_name.lower() not in ["classic", "knife"]:
-                                weapon_usage_by_puuid[puuid].append(weapon_name)
-
-                if teams_info["red"].get("has_won"):
-                    winning_team = "Red"
-                else:
-                    winning_team = "Blue"
-
-                for player_data in players_info:
-                    participant_puuid = player_data.get("puuid")
-                    if not participant_puuid or len(participant_puuid) < 10:
-                        continue
-
-                    if participant_puuid not in final_puuids_to_load:
-                        logger.debug(f"Пропуск статистики для игрока {player_data.get('name')}#{player_data.get('tag')} (PUUID: {participant_puuid})")
-                        continue
-
-                    logger.info(f"Сбор статистики для игрока: {player_data.get('name')}#{player_data.get('tag')} (PUUID: {participant_puuid}) в матче {match_id}")
-
-                    p_name = player_data.get("name", f"Игрок_{participant_puuid}")
-                    p_tag = player_data.get("tag", f"EUW")
-                    p_rank = player_data.get("currenttier_patched", "Unranked")
-                    p_username = f"{p_name}#{p_tag}"
-                    p_team = player_data.get("team")
-
-                    participant_obj, p_created = Player.objects.update_or_create(
+                # строки одного матча фиксируются вместе: версия данных игры увеличивается один раз на матч
+                with transaction.atomic():
+                    match_obj, match_created = Match.objects.update_or_create(
                         game_name=GameNames.VALORANT,
-                        puuid=participant_puuid,
+                        game_match_id=match_id,
                         defaults={
-                            "username": p_username,
-                            "rank": p_rank,
+                            "match_timestamp": match_datetime_str,
+                            "duration_seconds": game_lenght,
+                            "map_name": map_name,
+                            "rounds_played": rounds_played,
+                            "game_mode": game_mode,
+                            "is_ranked": is_ranked_flag,
                         }
                     )
 
-                    if p_created:
-                        logger.info(f"Создан/найден участник матча: {p_username}")
+                    action_match = "добавлен" if match_created else "обновлен"
+                    logger.info(f"Матч {match_id} ({map_name}) {action_match}")
+
+                    plants_by_puuid = defaultdict(int)
+                    defuses_by_puuid = defaultdict(int)
+                    weapon_usage_by_puuid = defaultdict(list)
+
+                    for round_data in rounds_info:
+                        plant_info = round_data.get("plant_events", {})
+                        defuse_info = round_data.get("defuse_events", {})
+                        if plant_info:
+                            if plant_info["planted_by"] is not None:
+                                planter_puuid = plant_info["planted_by"].get("puuid")
+                                if planter_puuid:
+                                    plants_by_puuid[planter_puuid] += 1
+                        if defuse_info:
+                            if defuse_info["defused_by"] is not None:
+                                defuser_puuid = defuse_info["defused_by"].get("puuid")
+                                if defuser_puuid:
+                                    defuses_by_puuid[defuser_puuid] += 1
+
+                        for player_round_stats in round_data.get("player_stats", []):
+                            puuid = player_round_stats.get("player_puuid")
+                            if not puuid:
+                                continue
+
+                            economy_data = player_round_stats.get("economy", {})
+                            if not economy_data:
+                                continue
+
+                            weapon_data = economy_data.get("weapon")
+                            if weapon_data and weapon_data.get("name"):
+                                weapon_name = weapon_data["name"]
+
+                                # Исключаем стартовое оружие
+                                if weapon_name.lower() not in ["classic", "knife"]:
+                                    weapon_usage_by_puuid[puuid].append(weapon_name)
+
+                    if teams_info["red"].get("has_won"):
+                        winning_team = "Red"
+                    else:
+                        winning_team = "Blue"
 
-                    # Получаем статистику
-                    stats = player_data.get("stats")
-                    if not isinstance(stats, dict):
-                        logger.warning(f"Отсутствует статистика для {participant_obj.username} в матче {match_id}")
-                        continue
+                    for player_data in players_info:
+                        participant_puuid = player_data.get("puuid")
+                        if not participant_puuid or len(participant_puuid) < 10:
+                            continue
 
-                    # Определяем победу
-                    player_won = (p_team == winning_team)
+                        if participant_puuid not in final_puuids_to_load:
+                            logger.debug(f"Пропуск статистики для игрока {player_data.get('name')}#{player_data.get('tag')} (PUUID: {participant_puuid})")
+                            continue
 
-                    kills = stats.get("kills", 0)
-                    deaths = stats.get("deaths", 0)
-                    assists = stats.get("assists", 0)
-                    if deaths == 0:
-                        kda = kills + assists
-                    else:
-                        kda = round((kills + assists) / deaths, 2)
-
-                    damage_dealt = player_data.get("damage_made", 0)
-
-                    ability_casts = player_data.get("ability_casts", {}) or {}
-                    skills_used = (ability_casts.get("q_cast", 0) +
-                                   ability_casts.get("e_cast", 0) +
-                                   ability_casts.get("c_cast", 0))
-                    ultimates_used = ability_casts.get("x_cast", 0)
-
-                    headshots = stats.get("headshots", 0)
-                    bodyshots = stats.get("bodyshots", 0)
-                    legshots = stats.get("legshots", 0)
-                    total_shots_hitted = headshots + bodyshots + legshots
-                    headshot_rate = round(headshots / total_shots_hitted) * 100
-
-                    bomb_plants = plants_by_puuid.get(participant_puuid, 0)
-                    bomb_defuses = defuses_by_puuid.get(participant_puuid, 0)
-
-                    player_weapon_kills = weapon_usage_by_puuid.get(participant_puuid)
-                    favorite_weapon_name = None
-                    if player_weapon_kills:
-                        weapon_counter = Counter(player_weapon_kills)
-                        most_common = weapon_counter.most_common()
-                        if most_common:
-                            if most_common[0][0]:
-                                favorite_weapon_name = most_common[0][0]
-                            elif len(most_common) > 1 and most_common[1][0]:
-                                favorite_weapon_name = most_common[1][0]
-
-                    stats_obj, stat_created = PlayerMatchStats.objects.update_or_create(
-                        game_name=GameNames.VALORANT,
-                        player=participant_obj,
-                        match=match_obj,
-                        defaults={
-                            "won_match": player_won,
-                            "kills": kills,
-                            "deaths": deaths,
-                            "kda": kda,
-                            "assists": assists,
-                            "damage_dealt": damage_dealt,
-                            "skills_used": skills_used,
-                            "ultimates_used": ultimates_used,
-                            "bomb_plants": bomb_plants,
-                            "bomb_defuses": bomb_defuses,
-                            "headshots": headshots,
-                            "bodyshots": bodyshots,
-                            "legshots": legshots,
-                            "headshot_rate": headshot_rate,
-                            "total_shots_hitted": total_shots_hitted,
-                            "primary_weapon_used": favorite_weapon_name or "",
-                        }
-                    )
+                        logger.info(f"Сбор статистики для игрока: {player_data.get('name')}#{player_data.get('tag')} (PUUID: {participant_puuid}) в матче {match_id}")
+
+                        p_name = player_data.get("name", f"Игрок_{participant_puuid}")
+                        p_tag = player_data.get("tag", f"EUW")
+                        p_rank = player_data.get("currenttier_patched", "Unranked")
+                        p_username = f"{p_name}#{p_tag}"
+                        p_team = player_data.get("team")
+
+                        participant_obj, p_created = Player.objects.update_or_create(
+                            game_name=GameNames.VALORANT,
+                            puuid=participant_puuid,
+                            defaults={
+                                "username": p_username,
+                                "rank": p_rank,
+                            }
+                        )
+
+                        if p_created:
+                            logger.info(f"Создан/найден участник матча: {p_username}")
+
+                        # Получаем статистику
+                        stats = player_data.get("stats")
+                        if not isinstance(stats, dict):
+                            logger.warning(f"Отсутствует статистика для {participant_obj.username} в матче {match_id}")
+                            continue
 
-                    action_stat = "Создана" if stat_created else "Обновлена"
-                    logger.info(f"{action_stat} для {p_username}")
+                        # Определяем победу
+                        player_won = (p_team == winning_team)
+
+                        kills = stats.get("kills", 0)
+                        deaths = stats.get("deaths", 0)
+                        assists = stats.get("assists", 0)
+                        if deaths == 0:
+                            kda = kills + assists
+                        else:
+                            kda = round((kills + assists) / deaths, 2)
+
+                        damage_dealt = player_data.get("damage_made", 0)
+
+                        ability_casts = player_data.get("ability_casts", {}) or {}
+                        skills_used = (ability_casts.get("q_cast", 0) +
+                                       ability_casts.get("e_cast", 0) +
+                                       ability_casts.get("c_cast", 0))
+                        ultimates_used = ability_casts.get("x_cast", 0)
+
+                        headshots = stats.get("headshots", 0)
+                        bodyshots = stats.get("bodyshots", 0)
+                        legshots = stats.get("legshots", 0)
+                        total_shots_hitted = headshots + bodyshots + legshots
+                        headshot_rate = round(headshots / total_shots_hitted) * 100
+
+                        bomb_plants = plants_by_puuid.get(participant_puuid, 0)
+                        bomb_defuses = defuses_by_puuid.get(participant_puuid, 0)
+
+                        player_weapon_kills = weapon_usage_by_puuid.get(participant_puuid)
+                        favorite_weapon_name = None
+                        if player_weapon_kills:
+                            weapon_counter = Counter(player_weapon_kills)
+                            most_common = weapon_counter.most_common()
+                            if most_common:
+                                if most_common[0][0]:
+                                    favorite_weapon_name = most_common[0][0]
+                                elif len(most_common) > 1 and most_common[1][0]:
+                                    favorite_weapon_name = most_common[1][0]
+
+                        stats_obj, stat_created = PlayerMatchStats.objects.update_or_create_with_game_stats(
+                            game_name=GameNames.VALORANT,
+                            player=participant_obj,
+                            match=match_obj,
+                            defaults={
+                                "won_match": player_won,
+                                "kills": kills,
+                                "deaths": deaths,
+                                "kda": kda,
+                                "assists": assists,
+                                "damage_dealt": damage_dealt,
+                                "skills_used": skills_used,
+                                "ultimates_used": ultimates_used,
+                                "bomb_plants": bomb_plants,
+                                "bomb_defuses": bomb_defuses,
+                                "headshots": headshots,
+                                "bodyshots": bodyshots,
+                                "legshots": legshots,
+                                "headshot_rate": headshot_rate,
+                                "total_shots_hitted": total_shots_hitted,
+                                "primary_weapon_used": favorite_weapon_name or "",
+                            }
+                        )
+
+                        action_stat = "Создана" if stat_created else "Обновлена"
+                        logger.info(f"{action_stat} для {p_username}")
 
                 processed_match_ids.add(match_id)
                 total_matches_processed += 1
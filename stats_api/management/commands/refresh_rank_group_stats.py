@@ -0,0 +1,33 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from stats_api.models import GameNames, RankGroupStatsSummary
+from stats_api.summaries import build_rank_group_summaries
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает сводки распределений метрик по рангам (гистограммы) для сравнения игроков"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--game_name", type=str, help="Обновить только указанную игру")
+        parser.add_argument("--rank", type=str, help="Обновить только указанный ранг")
+        parser.add_argument("--bins", type=int, default=32, help="Количество интервалов гистограммы")
+
+    def handle(self, *args, **options):
+        game_names = [options["game_name"]] if options["game_name"] else [value for value, _ in GameNames.choices]
+        for game_name in game_names:
+            summaries = build_rank_group_summaries(game_name, options["rank"], options["bins"])
+
+            with transaction.atomic():
+                stale_qs = RankGroupStatsSummary.objects.filter(game_name=game_name)
+                if options["rank"]:
+                    stale_qs = stale_qs.filter(rank=options["rank"])
+                stale_qs.delete()
+                RankGroupStatsSummary.objects.bulk_create(summaries)
+
+            logger.info(f"Сводки рангов для '{game_name}' обновлены: {len(summaries)}")
+            self.stdout.write(f"{game_name}: обновлено сводок: {len(summaries)}")
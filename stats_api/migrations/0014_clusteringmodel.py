@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0013_playermatchstats_unique_abilities_used'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClusteringModel',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_name', models.CharField(choices=[('valorant', 'Valorant'), ('pubg', 'PUBG')], help_text='Название игры', max_length=20, unique=True)),
+                ('backend', models.CharField(help_text='Алгоритм кластеризации', max_length=30)),
+                ('params', models.JSONField(default=dict, help_text='Параметры анализа, с которыми построена модель')),
+                ('feature_reference', models.JSONField(default=dict, help_text='Параметры вычисления производных признаков')),
+                ('scaler_mean', models.JSONField(default=list)),
+                ('scaler_scale', models.JSONField(default=list)),
+                ('core_points', models.BinaryField(help_text='Core-точки в масштабированном пространстве (numpy .npy)')),
+                ('core_labels', models.BinaryField(help_text='Кластеры core-точек (numpy .npy)')),
+                ('max_distance', models.FloatField(blank=True, help_text='Максимальное расстояние до core-точки (eps)', null=True)),
+                ('players_clustered', models.PositiveIntegerField(default=0)),
+                ('noise_ratio', models.FloatField(default=0.0, help_text='Доля шума при полном расчете')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Модель кластеризации',
+                'verbose_name_plural': 'Модели кластеризации',
+            },
+        ),
+    ]
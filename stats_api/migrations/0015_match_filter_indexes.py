@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0014_clusteringmodel'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['game_name', 'match_timestamp'], name='match_game_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['game_name', 'is_ranked', 'match_timestamp'], name='match_game_ranked_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['game_name', 'map_name', 'match_timestamp'], name='match_game_map_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playermatchstats',
+            index=models.Index(fields=['match', 'game_name'], name='pms_match_game_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0015_match_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankGroupStatsSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_name', models.CharField(choices=[('valorant', 'Valorant'), ('pubg', 'PUBG')], help_text='Название игры', max_length=20)),
+                ('rank', models.CharField(help_text='Ранг группы', max_length=100)),
+                ('metric', models.CharField(help_text='Поле PlayerMatchStats', max_length=50)),
+                ('match_count', models.PositiveIntegerField(default=0, help_text='Количество матчей с непустым значением')),
+                ('player_count', models.PositiveIntegerField(default=0, help_text='Количество игроков ранга')),
+                ('min_value', models.FloatField(blank=True, null=True)),
+                ('max_value', models.FloatField(blank=True, null=True)),
+                ('mean_value', models.FloatField(blank=True, null=True)),
+                ('bin_edges', models.JSONField(default=list, help_text='Границы интервалов гистограммы')),
+                ('histogram', models.JSONField(default=list, help_text='Количество матчей в каждом интервале')),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Сводка статистики ранга',
+                'verbose_name_plural': 'Сводки статистики рангов',
+                'unique_together': {('game_name', 'rank', 'metric')},
+            },
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-18 14:10
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0016_rankgroupstatssummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('match_timestamp'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), name='match_ts_id_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(models.F('game_name'), django.db.models.expressions.OrderBy(django.db.models.expressions.F('match_timestamp'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), name='match_game_ts_id_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0017_match_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GameDataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_name', models.CharField(help_text='Название игры', max_length=20, unique=True)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Версия данных игры',
+                'verbose_name_plural': 'Версии данных игр',
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 16:00
+
+from django.db import migrations
+
+
+def backfill_game_registry(apps, schema_editor):
+    """Регистрирует игры, данные которых были загружены до появления GameDataVersion"""
+    GameDataVersion = apps.get_model('stats_api', 'GameDataVersion')
+    game_names = set()
+    for model_name in ('Player', 'Match', 'PlayerMatchStats'):
+        model = apps.get_model('stats_api', model_name)
+        game_names.update(model.objects.order_by().values_list('game_name', flat=True).distinct())
+    existing = set(GameDataVersion.objects.values_list('game_name', flat=True))
+    GameDataVersion.objects.bulk_create([
+        GameDataVersion(game_name=game_name, version=1)
+        for game_name in sorted(game_names) if game_name and game_name not in existing
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0018_gamedataversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_game_registry, migrations.RunPython.noop),
+    ]
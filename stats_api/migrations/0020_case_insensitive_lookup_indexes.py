@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 16:40
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0019_backfill_gamedataversion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(django.db.models.functions.text.Upper('puuid'), models.F('game_name'), name='player_puuid_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(django.db.models.functions.text.Upper('username'), models.F('game_name'), name='player_username_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(django.db.models.functions.text.Upper('game_match_id'), models.F('game_name'), name='match_id_upper_idx'),
+        ),
+    ]
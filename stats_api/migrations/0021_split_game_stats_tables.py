@@ -0,0 +1,92 @@
+# Generated by Django 5.2 on 2026-10-18 17:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+VALORANT_FIELDS = [
+    'skills_used', 'ultimates_used', 'bomb_plants', 'bomb_defuses', 'headshots', 'bodyshots', 'legshots',
+    'total_shots_hitted', 'total_shots_fired', 'primary_weapon_used', 'armor_lvl1_purchases', 'armor_lvl2_purchases',
+]
+PUBG_FIELDS = ['boosts_used', 'heals_used', 'revives', 'dbnos', 'longest_kill_distance']
+EXTENSIONS = (('valorant', 'ValorantMatchStats', VALORANT_FIELDS), ('pubg', 'PubgMatchStats', PUBG_FIELDS))
+BATCH_SIZE = 2000
+
+
+def copy_to_extensions(apps, schema_editor):
+    """Переносит поля игры из широкой строки PlayerMatchStats в таблицу-расширение ее игры"""
+    PlayerMatchStats = apps.get_model('stats_api', 'PlayerMatchStats')
+    for game_name, model_name, fields in EXTENSIONS:
+        extension_model = apps.get_model('stats_api', model_name)
+        rows = PlayerMatchStats.objects.filter(game_name=game_name).order_by('id').values_list('id', *fields)
+        batch = []
+        for stats_id, *values in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append(extension_model(stats_id=stats_id, **dict(zip(fields, values))))
+            if len(batch) >= BATCH_SIZE:
+                extension_model.objects.bulk_create(batch)
+                batch = []
+        extension_model.objects.bulk_create(batch)
+
+
+def copy_from_extensions(apps, schema_editor):
+    PlayerMatchStats = apps.get_model('stats_api', 'PlayerMatchStats')
+    for _, model_name, fields in EXTENSIONS:
+        extension_model = apps.get_model('stats_api', model_name)
+        batch = []
+        for stats_id, *values in extension_model.objects.values_list('stats_id', *fields).iterator(chunk_size=BATCH_SIZE):
+            batch.append(PlayerMatchStats(id=stats_id, **dict(zip(fields, values))))
+            if len(batch) >= BATCH_SIZE:
+                PlayerMatchStats.objects.bulk_update(batch, fields)
+                batch = []
+        PlayerMatchStats.objects.bulk_update(batch, fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0020_case_insensitive_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValorantMatchStats',
+            fields=[
+                ('stats', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='valorant', serialize=False, to='stats_api.playermatchstats')),
+                ('skills_used', models.PositiveIntegerField(blank=True, default=0, help_text='Общее кол-во примененных умений (кроме ультимейтов)', null=True)),
+                ('ultimates_used', models.PositiveIntegerField(blank=True, default=0, help_text='Кол-во примененных ультимейтов', null=True)),
+                ('bomb_plants', models.PositiveIntegerField(blank=True, default=0, help_text='Сколько раз установил бомбу', null=True)),
+                ('bomb_defuses', models.PositiveIntegerField(blank=True, default=0, help_text='Сколько раз обезвредил бомбу', null=True)),
+                ('headshots', models.PositiveIntegerField(blank=True, default=0, null=True)),
+                ('bodyshots', models.PositiveIntegerField(blank=True, default=0, null=True)),
+                ('legshots', models.PositiveIntegerField(blank=True, default=0, null=True)),
+                ('total_shots_hitted', models.PositiveIntegerField(blank=True, default=0, help_text='Всего выстрелов попали', null=True)),
+                ('total_shots_fired', models.PositiveIntegerField(blank=True, default=0, help_text='Всего выстрелов сделано', null=True)),
+                ('primary_weapon_used', models.CharField(blank=True, help_text='Основное/самое результативное оружие', max_length=100, null=True)),
+                ('armor_lvl1_purchases', models.PositiveIntegerField(blank=True, default=0, help_text='Сколько раз купил броню 1 ур.', null=True)),
+                ('armor_lvl2_purchases', models.PositiveIntegerField(blank=True, default=0, help_text='Сколько раз купил броню 2 ур.', null=True)),
+            ],
+            options={
+                'verbose_name': 'Статистика Valorant',
+                'verbose_name_plural': 'Статистика Valorant',
+            },
+        ),
+        migrations.CreateModel(
+            name='PubgMatchStats',
+            fields=[
+                ('stats', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pubg', serialize=False, to='stats_api.playermatchstats')),
+                ('boosts_used', models.PositiveIntegerField(blank=True, default=0, help_text='Количество использованных усилений', null=True)),
+                ('heals_used', models.PositiveIntegerField(blank=True, default=0, help_text='Количество использованных усилений лечений', null=True)),
+                ('revives', models.PositiveIntegerField(blank=True, default=0, help_text='Количество воскрешенных союзников', null=True)),
+                ('dbnos', models.PositiveIntegerField(blank=True, default=0, help_text='Down But Not Out - количество нокаутов', null=True)),
+                ('longest_kill_distance', models.PositiveIntegerField(blank=True, default=0, help_text='Самое дальнее убийство', null=True)),
+            ],
+            options={
+                'verbose_name': 'Статистика PUBG',
+                'verbose_name_plural': 'Статистика PUBG',
+            },
+        ),
+        migrations.RunPython(copy_to_extensions, copy_from_extensions),
+        *[
+            migrations.RemoveField(model_name='playermatchstats', name=field_name)
+            for field_name in VALORANT_FIELDS + PUBG_FIELDS
+        ],
+    ]
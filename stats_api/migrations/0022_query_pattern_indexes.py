@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0021_split_game_stats_tables'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['game_name', 'rank'], name='player_game_rank_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playermatchstats',
+            index=models.Index(fields=['game_name', 'player'], include=('kills', 'deaths', 'assists', 'kda', 'headshot_rate', 'damage_dealt', 'unique_abilities_used'), name='pms_game_player_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 19:30
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+def copy_match_fields(apps, schema_editor):
+    Match = apps.get_model('stats_api', 'Match')
+    PlayerMatchStats = apps.get_model('stats_api', 'PlayerMatchStats')
+    match = Match.objects.filter(pk=models.OuterRef('match_id'))
+    PlayerMatchStats.objects.update(
+        match_timestamp=models.Subquery(match.values('match_timestamp')[:1]),
+        is_ranked=models.Subquery(match.values('is_ranked')[:1]),
+        map_name=models.Subquery(match.values('map_name')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0022_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='playermatchstats',
+            name='match_timestamp',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Дата и время начала игры (из матча)', null=True),
+        ),
+        migrations.AddField(
+            model_name='playermatchstats',
+            name='is_ranked',
+            field=models.BooleanField(blank=True, editable=False, help_text='Ранговый ли матч (из матча)', null=True),
+        ),
+        migrations.AddField(
+            model_name='playermatchstats',
+            name='map_name',
+            field=models.CharField(blank=True, editable=False, help_text='Название карты (из матча)', max_length=100, null=True),
+        ),
+        migrations.RunPython(copy_match_fields, migrations.RunPython.noop),
+        migrations.AlterModelOptions(
+            name='playermatchstats',
+            options={'ordering': ['-match_timestamp'], 'verbose_name': 'Статистика игрока за матч', 'verbose_name_plural': 'Статистика игроков за матчи'},
+        ),
+        migrations.AddIndex(
+            model_name='playermatchstats',
+            index=models.Index(models.F('player'), django.db.models.expressions.OrderBy(django.db.models.expressions.F('match_timestamp'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), name='pms_player_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playermatchstats',
+            index=models.Index(fields=['game_name', 'match_timestamp'], name='pms_game_ts_idx'),
+        ),
+    ]
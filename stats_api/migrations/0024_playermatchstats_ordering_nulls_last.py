@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-19 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0023_playermatchstats_match_copy_fields'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='playermatchstats',
+            options={'ordering': [models.OrderBy(models.F('match_timestamp'), descending=True, nulls_last=True)], 'verbose_name': 'Статистика игрока за матч', 'verbose_name_plural': 'Статистика игроков за матчи'},
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 00:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0024_playermatchstats_ordering_nulls_last'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clusteringmodel',
+            name='core_radii',
+            field=models.BinaryField(blank=True, help_text='Радиусы core-точек вместо общего max_distance (HDBSCAN, numpy .npy)', null=True),
+        ),
+    ]
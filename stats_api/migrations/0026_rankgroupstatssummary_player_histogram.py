@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-19 00:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats_api', '0025_clusteringmodel_core_radii'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rankgroupstatssummary',
+            name='histogram',
+            field=models.JSONField(default=list, help_text='Количество игроков (по среднему за последние матчи) в каждом интервале'),
+        ),
+    ]
@@ -1,10 +1,28 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Upper
 
 
 class GameNames(models.TextChoices):
     VALORANT = "valorant", "Valorant"
     PUBG = "pubg", "PUBG"
 
+class PlayerQuerySet(models.QuerySet):
+    """Поиск по идентификаторам без учета регистра: выражение совпадает с функциональными индексами по UPPER()"""
+
+    def puuid_iexact(self, puuid):
+        return self.alias(puuid_upper=Upper('puuid')).filter(puuid_upper=Upper(Value(puuid)))
+
+    def username_iexact(self, username):
+        return self.alias(username_upper=Upper('username')).filter(username_upper=Upper(Value(username)))
+
+
+class MatchQuerySet(models.QuerySet):
+    def game_match_id_iexact(self, game_match_id):
+        return self.alias(game_match_id_upper=Upper('game_match_id')).filter(
+            game_match_id_upper=Upper(Value(game_match_id)))
+
+
 class Player(models.Model):
     game_name = models.CharField(max_length=20, choices=GameNames.choices, default=GameNames.VALORANT, help_text="Название игры")
     puuid = models.CharField(max_length=80, unique=True, db_index=True, null=True, blank=True, verbose_name="PUUID", help_text="Уникальный идентификатор игрока")
@@ -12,11 +30,20 @@ class Player(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     rank = models.CharField(max_length=100, unique=False, db_index=True, null=True, blank=True, help_text="Ранг игрока")
 
+    objects = PlayerQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Игрок"
         verbose_name_plural = "Игроки"
         ordering = ["username"]
         unique_together = ("puuid", "game_name")
+        indexes = [
+            # поиск по puuid/username без учета регистра в пределах игры
+            models.Index(Upper("puuid"), "game_name", name="player_puuid_upper_idx"),
+            models.Index(Upper("username"), "game_name", name="player_username_upper_idx"),
+            # группы рангов в сравнении игроков и сводках
+            models.Index(fields=["game_name", "rank"], name="player_game_rank_idx"),
+        ]
 
     def __str__(self):
         game_name = f"[{self.get_game_name_display()}]"
@@ -37,9 +64,30 @@ class Match(models.Model):
     game_mode = models.CharField(max_length=150, blank=True, null=True, help_text="Режим игры")
     is_ranked = models.BooleanField(blank=True, null=True, help_text="Является ли матч ранговым")
 
+    objects = MatchQuerySet.as_manager()
+
     class Meta:
         ordering = ["-match_timestamp"]
         unique_together = ("game_match_id", "game_name")
+        indexes = [
+            # фильтры аналитики: период, ранговые матчи, карта в пределах игры
+            models.Index(fields=["game_name", "match_timestamp"], name="match_game_ts_idx"),
+            models.Index(fields=["game_name", "is_ranked", "match_timestamp"], name="match_game_ranked_ts_idx"),
+            models.Index(fields=["game_name", "map_name", "match_timestamp"], name="match_game_map_ts_idx"),
+            # курсорная пагинация списка матчей по (match_timestamp, id)
+            models.Index(F("match_timestamp").desc(nulls_last=True), F("id").desc(), name="match_ts_id_keyset_idx"),
+            models.Index("game_name", F("match_timestamp").desc(nulls_last=True), F("id").desc(),
+                         name="match_game_ts_id_keyset_idx"),
+            # поиск по game_match_id без учета регистра
+            models.Index(Upper("game_match_id"), "game_name", name="match_id_upper_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # поля матча, скопированные в строки статистики
+        self.match_stats.exclude(
+            match_timestamp=self.match_timestamp, is_ranked=self.is_ranked, map_name=self.map_name
+        ).update(match_timestamp=self.match_timestamp, is_ranked=self.is_ranked, map_name=self.map_name)
 
     def __str__(self):
         game_name = f"[{self.get_game_name_display()}]"
@@ -47,6 +95,23 @@ class Match(models.Model):
         timestamp_str = self.match_timestamp.strftime('%Y-%m-%d %H:%M') if self.match_timestamp else "Нет временной метки"
         return f"{game_name} матч {self.id or self.game_match_id}{mode}, временная метка {timestamp_str}"
 
+class PlayerMatchStatsQuerySet(models.QuerySet):
+    def update_or_create_with_game_stats(self, defaults=None, **lookup):
+        """update_or_create для основной строки статистики и строки расширения ее игры.
+        defaults может содержать поля обеих таблиц - они разделяются по моделям"""
+        defaults = dict(defaults or {})
+        game_fields = {name for names in GAME_STATS_FIELDS.values() for name in names}
+        game_values = {name: defaults.pop(name) for name in list(defaults) if name in game_fields}
+
+        stats, created = self.update_or_create(defaults=defaults, **lookup)
+        extension_model = GAME_STATS_MODELS.get(stats.game_name)
+        if extension_model is not None:
+            extension_values = {name: value for name, value in game_values.items()
+                                if name in GAME_STATS_FIELDS[stats.game_name]}
+            extension_model.objects.update_or_create(stats=stats, defaults=extension_values)
+        return stats, created
+
+
 class PlayerMatchStats(models.Model):
     game_name = models.CharField(max_length=20, choices=GameNames.choices, default=GameNames.VALORANT, help_text="Название игры")
     player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="match_stats")
@@ -65,7 +130,64 @@ class PlayerMatchStats(models.Model):
     # Время
     time_alive_seconds = models.PositiveIntegerField(default=0, null=True, blank=True, help_text="Общее время жизни в матче в секундах")
 
-    # Valorant поля
+    # Копия полей матча: сортировка и фильтры истории без соединения с Match. Заполняются в save()
+    match_timestamp = models.DateTimeField(null=True, blank=True, editable=False, help_text="Дата и время начала игры (из матча)")
+    is_ranked = models.BooleanField(null=True, blank=True, editable=False, help_text="Ранговый ли матч (из матча)")
+    map_name = models.CharField(max_length=100, null=True, blank=True, editable=False, help_text="Название карты (из матча)")
+
+    # Поля конкретной игры хранятся в таблицах-расширениях ValorantMatchStats / PubgMatchStats (связь 1:1)
+
+    objects = PlayerMatchStatsQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ("player", "match")
+        indexes = [
+            # соединение отфильтрованных матчей со статистикой игры
+            models.Index(fields=["match", "game_name"], name="pms_match_game_idx"),
+            # GROUP BY игрока в DBSCAN анализе; в PostgreSQL - покрывающий индекс с общими метриками
+            models.Index(fields=["game_name", "player"], name="pms_game_player_idx",
+                         include=["kills", "deaths", "assists", "kda", "headshot_rate", "damage_dealt",
+                                  "unique_abilities_used"]),
+            # последние N матчей игрока и курсор истории - один проход по индексу без соединения;
+            # запросы сортируют с NULLS LAST, как индекс, иначе PostgreSQL не использует его для ORDER BY
+            models.Index(F("player"), F("match_timestamp").desc(nulls_last=True), F("id").desc(),
+                         name="pms_player_ts_idx"),
+            # фильтр по периоду в аналитике игры
+            models.Index(fields=["game_name", "match_timestamp"], name="pms_game_ts_idx"),
+        ]
+
+        ordering = [F("match_timestamp").desc(nulls_last=True)]
+        verbose_name = "Статистика игрока за матч"
+        verbose_name_plural = "Статистика игроков за матчи"
+
+    MATCH_COPIED_FIELDS = ("match_timestamp", "is_ranked", "map_name")
+
+    def save(self, *args, **kwargs):
+        if not self.game_name:
+            if self.match:
+                self.game_name = self.match.game_name
+            elif self.player:
+                self.game_name = self.player.game_name
+        if self.match_id:
+            for field_name in self.MATCH_COPIED_FIELDS:
+                setattr(self, field_name, getattr(self.match, field_name))
+            # update_or_create сохраняет только поля из defaults - копии полей матча добавляются к ним
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], *self.MATCH_COPIED_FIELDS}
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        game_name = f"[{self.get_game_name_display()}]"
+        player_name = self.player.username if self.player else "N/A"
+        match_id_str = self.match.game_match_id if self.match else "N/A"
+        win_status = "Победа" if self.won_match else "Проигрыш"
+        return f"{game_name} {player_name} в матче {match_id_str} - {win_status}"
+
+
+class ValorantMatchStats(models.Model):
+    """Показатели матча, которые есть только в Valorant"""
+    stats = models.OneToOneField(PlayerMatchStats, on_delete=models.CASCADE, primary_key=True, related_name="valorant")
+
     # Умения
     skills_used = models.PositiveIntegerField(default=0, null=True, blank=True, help_text="Общее кол-во примененных умений (кроме ультимейтов)")
     ultimates_used = models.PositiveIntegerField(default=0, null=True, blank=True, help_text="Кол-во примененных ультимейтов")
@@ -88,32 +210,128 @@ class PlayerMatchStats(models.Model):
     armor_lvl1_purchases = models.PositiveIntegerField(default=0, null=True, blank=True, help_text="Сколько раз купил броню 1 ур.")
     armor_lvl2_purchases = models.PositiveIntegerField(default=0, null=True, blank=True, help_text="Сколько раз купил броню 2 ур.")
 
-    # PUBG поля
+    class Meta:
+        verbose_name = "Статистика Valorant"
+        verbose_name_plural = "Статистика Valorant"
+
+
+class PubgMatchStats(models.Model):
+    """Показатели матча, которые есть только в PUBG"""
+    stats = models.OneToOneField(PlayerMatchStats, on_delete=models.CASCADE, primary_key=True, related_name="pubg")
+
     boosts_used = models.PositiveIntegerField(default=0, null=True, blank=True,help_text="Количество использованных усилений")
     heals_used = models.PositiveIntegerField(default=0, null=True, blank=True, help_text="Количество использованных усилений лечений")
     revives = models.PositiveIntegerField(default=0, null=True, blank=True, help_text="Количество воскрешенных союзников")
     dbnos = models.PositiveIntegerField(default=0, null=True, blank=True, help_text="Down But Not Out - количество нокаутов")
     longest_kill_distance = models.PositiveIntegerField(default=0, null=True, blank=True, help_text="Самое дальнее убийство")
 
+    class Meta:
+        verbose_name = "Статистика PUBG"
+        verbose_name_plural = "Статистика PUBG"
+
+
+# Таблица-расширение статистики для каждой игры, имя обратной связи от PlayerMatchStats и ее поля
+GAME_STATS_MODELS = {
+    GameNames.VALORANT.value: ValorantMatchStats,
+    GameNames.PUBG.value: PubgMatchStats,
+}
+GAME_STATS_RELATIONS = {game_name: model._meta.get_field("stats").remote_field.related_name
+                        for game_name, model in GAME_STATS_MODELS.items()}
+GAME_STATS_FIELDS = {game_name: [field.name for field in model._meta.concrete_fields if field.name != "stats"]
+                     for game_name, model in GAME_STATS_MODELS.items()}
+
+
+def stats_field_path(field_name):
+    """Путь ORM от PlayerMatchStats к полю статистики: 'kills' или 'valorant__skills_used'"""
+    for game_name, fields in GAME_STATS_FIELDS.items():
+        if field_name in fields:
+            return f"{GAME_STATS_RELATIONS[game_name]}__{field_name}"
+    return field_name
+
+
+def stats_field(field_name):
+    """Поле модели (основной таблицы или расширения) по имени поля статистики"""
+    for game_name, fields in GAME_STATS_FIELDS.items():
+        if field_name in fields:
+            return GAME_STATS_MODELS[game_name]._meta.get_field(field_name)
+    return PlayerMatchStats._meta.get_field(field_name)
+
+
+class ClusteringModel(models.Model):
+    """Сохраненная модель кластеризации игры для назначения кластеров новым игрокам без полного перерасчета"""
+    game_name = models.CharField(max_length=20, choices=GameNames.choices, unique=True, help_text="Название игры")
+    backend = models.CharField(max_length=30, help_text="Алгоритм кластеризации")
+    params = models.JSONField(default=dict, help_text="Параметры анализа, с которыми построена модель")
+    feature_reference = models.JSONField(default=dict, help_text="Параметры вычисления производных признаков")
+    scaler_mean = models.JSONField(default=list)
+    scaler_scale = models.JSONField(default=list)
+    core_points = models.BinaryField(help_text="Core-точки в масштабированном пространстве (numpy .npy)")
+    core_labels = models.BinaryField(help_text="Кластеры core-точек (numpy .npy)")
+    max_distance = models.FloatField(null=True, blank=True, help_text="Максимальное расстояние до core-точки (eps)")
+    core_radii = models.BinaryField(null=True, blank=True,
+                                    help_text="Радиусы core-точек вместо общего max_distance (HDBSCAN, numpy .npy)")
+    players_clustered = models.PositiveIntegerField(default=0)
+    noise_ratio = models.FloatField(default=0.0, help_text="Доля шума при полном расчете")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        unique_together = ("player", "match")
+        verbose_name = "Модель кластеризации"
+        verbose_name_plural = "Модели кластеризации"
 
-        ordering = ["-match__match_timestamp"]
-        verbose_name = "Статистика игрока за матч"
-        verbose_name_plural = "Статистика игроков за матчи"
+    def __str__(self):
+        return f"[{self.get_game_name_display()}] {self.backend}, игроков: {self.players_clustered}"
 
-    def save(self, *args, **kwargs):
-        if not self.game_name:
-            if self.match:
-                self.game_name = self.match.game_name
-            elif self.player:
-                self.game_name = self.player.game_name
-        super().save(*args, **kwargs)
+
+class RankGroupStatsSummary(models.Model):
+    """Сводка метрики игроков одного ранга: границы и среднее по матчам, гистограмма средних игроков
+    за последние матчи. Обновляется командой refresh_rank_group_stats, используется в сравнении игрока с группой"""
+    game_name = models.CharField(max_length=20, choices=GameNames.choices, help_text="Название игры")
+    rank = models.CharField(max_length=100, help_text="Ранг группы")
+    metric = models.CharField(max_length=50, help_text="Поле PlayerMatchStats")
+    match_count = models.PositiveIntegerField(default=0, help_text="Количество матчей с непустым значением")
+    player_count = models.PositiveIntegerField(default=0, help_text="Количество игроков ранга")
+    min_value = models.FloatField(null=True, blank=True)
+    max_value = models.FloatField(null=True, blank=True)
+    mean_value = models.FloatField(null=True, blank=True)
+    bin_edges = models.JSONField(default=list, help_text="Границы интервалов гистограммы")
+    histogram = models.JSONField(default=list, help_text="Количество игроков (по среднему за последние матчи) в каждом интервале")
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("game_name", "rank", "metric")
+        verbose_name = "Сводка статистики ранга"
+        verbose_name_plural = "Сводки статистики рангов"
+
+    def percentile_of(self, value):
+        """Доля игроков группы (в %) со средним ниже value; внутри интервала - линейная интерполяция"""
+        players_in_histogram = sum(self.histogram)
+        if value is None or not players_in_histogram:
+            return None
+        below = 0.0
+        for count, left, right in zip(self.histogram, self.bin_edges, self.bin_edges[1:]):
+            if value >= right:
+                below += count
+            elif value > left:
+                below += count * (value - left) / (right - left)
+                break
+            else:
+                break
+        return round(min(below / players_in_histogram, 1.0) * 100, 1)
 
     def __str__(self):
-        game_name = f"[{self.get_game_name_display()}]"
-        player_name = self.player.username if self.player else "N/A"
-        match_id_str = self.match.game_match_id if self.match else "N/A"
-        win_status = "Победа" if self.won_match else "Проигрыш"
-        return f"{game_name} {player_name} в матче {match_id_str} - {win_status}"
+        return f"[{self.get_game_name_display()}] {self.rank} - {self.metric} ({self.match_count} матчей)"
+
+
+class GameDataVersion(models.Model):
+    """Счетчик версии данных игры: увеличивается при любом изменении игроков, матчей или статистики.
+    Используется для ETag/Last-Modified в условных GET запросах и как реестр игр, для которых есть данные"""
+    game_name = models.CharField(max_length=20, unique=True, help_text="Название игры")
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Версия данных игры"
+        verbose_name_plural = "Версии данных игр"
+
+    def __str__(self):
+        return f"{self.game_name}: версия {self.version}"
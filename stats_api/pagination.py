@@ -0,0 +1,174 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db import connection
+from django.db.models import F
+from django.db.models.fields.tuple_lookups import Tuple, TupleLessThan
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def approximate_count(queryset):
+    """Оценка числа строк: для нефильтрованного запроса в PostgreSQL - pg_class.reltuples, иначе COUNT(*)"""
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        # reltuples = -1, пока таблица ни разу не анализировалась
+        if row and row[0] is not None and row[0] >= 0:
+            return int(row[0])
+    return queryset.count()
+
+
+class OptionalCountLimitOffsetPagination(LimitOffsetPagination):
+    """LimitOffsetPagination, в которой COUNT(*) считается только при count=true (или приближенно при count=approx)"""
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        count_mode = request.query_params.get(self.count_query_param, '').strip().lower()
+        if count_mode in ('true', '1', 'yes'):
+            self.count = queryset.count()
+        elif count_mode == 'approx':
+            self.count = approximate_count(queryset)
+        else:
+            self.count = None
+
+        # лишняя строка показывает, есть ли следующая страница, без COUNT(*)
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[:self.limit]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_previous_link(self):
+        if self.offset <= 0:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        if self.offset - self.limit <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, self.offset - self.limit)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class KeysetPagination(BasePagination):
+    """Курсорная (keyset) пагинация по (timestamp_field, id) в порядке убывания: стоимость страницы
+    не зависит от ее номера. Курсор - base64 от последней пары (timestamp, id) страницы.
+    Запросы с offset обслуживаются OptionalCountLimitOffsetPagination для совместимости"""
+    timestamp_field = 'match_timestamp'
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    offset_query_param = 'offset'
+    count_query_param = 'count'
+    max_limit = 1000
+    page_size = api_settings.PAGE_SIZE
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+            if limit > 0:
+                return min(limit, self.max_limit)
+        except (KeyError, ValueError):
+            pass
+        return self.page_size
+
+    def encode_cursor(self, timestamp, pk):
+        payload = json.dumps({"ts": timestamp.isoformat() if timestamp else None, "id": pk})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            timestamp = parse_datetime(payload["ts"]) if payload["ts"] else None
+            return timestamp, int(payload["id"])
+        except (ValueError, TypeError, KeyError):
+            raise NotFound("Некорректный курсор.")
+
+    def get_position(self, row):
+        """Пара (timestamp, id) для модели или строки .values()"""
+        if isinstance(row, dict):
+            return row.get(self.timestamp_field), row['id']
+        return getattr(row, self.timestamp_field), row.pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # строки без даты идут в конце, как NULLS LAST в индексах; порядок общий для курсора и offset
+        queryset = queryset.order_by(F(self.timestamp_field).desc(nulls_last=True), '-id')
+        if self.offset_query_param in request.query_params:
+            self.offset_paginator = OptionalCountLimitOffsetPagination()
+            return self.offset_paginator.paginate_queryset(queryset, request, view)
+
+        self.offset_paginator = None
+        self.request = request
+        self.limit = self.get_limit(request)
+        count_mode = request.query_params.get(self.count_query_param, '').strip().lower()
+        if count_mode in ('true', '1', 'yes'):
+            self.count = queryset.count()
+        elif count_mode == 'approx':
+            self.count = approximate_count(queryset)
+        else:
+            self.count = None
+
+        rows = self.get_rows(queryset, self.decode_cursor(request))
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_rows(self, queryset, cursor):
+        """limit + 1 строк после курсора. Строки с датой выбираются по сравнению строк
+        (timestamp, id) < (курсор) - одна граница диапазона индекса; хвост без даты - отдельным запросом"""
+        size = self.limit + 1
+        if cursor is None:
+            return list(queryset[:size])
+        timestamp, pk = cursor
+        null_tail = queryset.filter(**{f'{self.timestamp_field}__isnull': True})
+        if timestamp is None:
+            return list(null_tail.filter(id__lt=pk)[:size])
+        rows = list(queryset.filter(
+            TupleLessThan(Tuple(F(self.timestamp_field), F('id')), (timestamp, pk)))[:size])
+        if len(rows) < size:
+            rows += null_tail[:size - len(rows)]
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or self.last_row is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        cursor = self.encode_cursor(*self.get_position(self.last_row))
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        if self.offset_paginator:
+            return self.offset_paginator.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('results', data),
+        ]))
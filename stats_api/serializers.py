@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.core.validators import MinValueValidator, MaxValueValidator
-from .models import Player, Match, PlayerMatchStats, GameNames
+from .models import Player, Match, PlayerMatchStats, GameNames, GAME_STATS_FIELDS, stats_field_path
 
 
 class PlayerSerializer(serializers.ModelSerializer):
@@ -28,6 +28,27 @@ class PlayerMatchStatsSerializer(serializers.ModelSerializer):
                                               read_only=True)
     match_info = MatchSerializer(source="match", read_only=True)
 
+    # Valorant (таблица ValorantMatchStats), для строк другой игры - null
+    skills_used = serializers.IntegerField(source="valorant.skills_used", read_only=True)
+    ultimates_used = serializers.IntegerField(source="valorant.ultimates_used", read_only=True)
+    bomb_plants = serializers.IntegerField(source="valorant.bomb_plants", read_only=True)
+    bomb_defuses = serializers.IntegerField(source="valorant.bomb_defuses", read_only=True)
+    headshots = serializers.IntegerField(source="valorant.headshots", read_only=True)
+    bodyshots = serializers.IntegerField(source="valorant.bodyshots", read_only=True)
+    legshots = serializers.IntegerField(source="valorant.legshots", read_only=True)
+    total_shots_fired = serializers.IntegerField(source="valorant.total_shots_fired", read_only=True)
+    total_shots_hitted = serializers.IntegerField(source="valorant.total_shots_hitted", read_only=True)
+    primary_weapon_used = serializers.CharField(source="valorant.primary_weapon_used", read_only=True)
+    armor_lvl1_purchases = serializers.IntegerField(source="valorant.armor_lvl1_purchases", read_only=True)
+    armor_lvl2_purchases = serializers.IntegerField(source="valorant.armor_lvl2_purchases", read_only=True)
+
+    # PUBG (таблица PubgMatchStats)
+    boosts_used = serializers.IntegerField(source="pubg.boosts_used", read_only=True)
+    heals_used = serializers.IntegerField(source="pubg.heals_used", read_only=True)
+    revives = serializers.IntegerField(source="pubg.revives", read_only=True)
+    dbnos = serializers.IntegerField(source="pubg.dbnos", read_only=True)
+    longest_kill_distance = serializers.IntegerField(source="pubg.longest_kill_distance", read_only=True)
+
     class Meta:
         model = PlayerMatchStats
         fields = [
@@ -45,6 +66,58 @@ class PlayerMatchStatsSerializer(serializers.ModelSerializer):
         read_only_fields = ["player", "match"]
 
 
+class FlatPlayerMatchStatsSerializer:
+    """Плоское представление статистики для больших выборок: строки читаются через .values()
+    без ModelSerializer, колонки другой игры отбрасываются"""
+    field_sources = {
+        "id": "id",
+        "player": "player_id",
+        "player_username": "player__username",
+        "match": "match_id",
+        "game_match_id": "match__game_match_id",
+        "match_timestamp": "match_timestamp",
+        "map_name": "map_name",
+        "game_mode": "match__game_mode",
+        "is_ranked": "is_ranked",
+        "game_name": "game_name",
+        **{name: stats_field_path(name) for name in [
+            "won_match", "kills", "deaths", "assists", "kda", "headshot_rate", "damage_dealt",
+            "unique_abilities_used", "time_alive_seconds",
+            *GAME_STATS_FIELDS[GameNames.VALORANT.value],
+            *GAME_STATS_FIELDS[GameNames.PUBG.value],
+        ]},
+    }
+
+    def __init__(self, fields=None):
+        unknown_fields = [name for name in fields or [] if name not in self.field_sources]
+        if unknown_fields:
+            raise serializers.ValidationError(
+                {"fields": f"Неизвестные поля: {', '.join(unknown_fields)}. Доступны: {', '.join(self.field_sources)}."})
+        self.fields = list(fields) if fields else list(self.field_sources)
+        # пары (имя, источник) для каждой игры считаются один раз, а не на каждую строку
+        self._game_columns = {
+            game_name: [(name, self.field_sources[name]) for name in self.fields
+                        if not any(name in game_fields for other_game, game_fields in
+                                   GAME_STATS_FIELDS.items() if other_game != game_name)]
+            for game_name in GameNames.values
+        }
+        self._all_columns = [(name, self.field_sources[name]) for name in self.fields]
+
+    @property
+    def value_fields(self):
+        """Колонки для .values(): запрошенные поля плюс ключи сортировки и игра"""
+        sources = {self.field_sources[name] for name in self.fields}
+        sources.update({"id", "game_name", "match_timestamp"})
+        return sorted(sources)
+
+    def to_representation(self, row):
+        columns = self._game_columns.get(row["game_name"], self._all_columns)
+        return {name: row[source] for name, source in columns}
+
+    def rows(self, values):
+        return [self.to_representation(row) for row in values]
+
+
 class PlayerOverallStatsSerializer(serializers.Serializer):
     player_id = serializers.IntegerField()
     username = serializers.CharField()
@@ -109,37 +182,3 @@ class PlayerOverallStatsSerializer(serializers.Serializer):
             except ValueError:  # На случай если game_name_value невалиден
                 representation['game_name_display'] = game_name_value
         return representation
-
-
-class DBSCANResultItemSerializer(serializers.Serializer):
-    player_id = serializers.IntegerField()
-    puuid = serializers.CharField(required=False, allow_null=True)
-    username = serializers.CharField()
-    game_name = serializers.ChoiceField(choices=GameNames.choices)
-    cluster = serializers.IntegerField()
-
-    # Общие метрики
-    avg_kills = serializers.FloatField()
-    avg_deaths = serializers.FloatField()
-    avg_assists = serializers.FloatField()
-    avg_kda = serializers.FloatField()
-    avg_headshot_rate = serializers.FloatField()
-    avg_damage_dealt = serializers.FloatField()
-    avg_unique_game_abilities = serializers.FloatField()
-
-
-class DBSCANResultSerializer(serializers.Serializer):
-    player_id = serializers.IntegerField()
-    puuid = serializers.CharField(required=False, allow_blank=True, allow_null=True)
-    username = serializers.CharField()
-    game_name = serializers.CharField()
-    cluster = serializers.IntegerField()
-    num_matches = serializers.IntegerField(required=False, allow_null=True)
-    avg_kills = serializers.FloatField(required=False, allow_null=True)
-    avg_deaths = serializers.FloatField(required=False, allow_null=True)
-    avg_assists = serializers.FloatField(required=False, allow_null=True)
-    avg_kda = serializers.FloatField(required=False, allow_null=True)
-    avg_headshot_rate = serializers.FloatField(required=False, allow_null=True)
-    avg_damage_dealt = serializers.FloatField(required=False, allow_null=True)
-    avg_unique_game_abilities = serializers.FloatField(required=False, allow_null=True)
-    combat_performance_score = serializers.FloatField(required=False, allow_null=True)
@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .caching import invalidate_cached_responses
+from .models import Match, Player, PlayerMatchStats
+from .versioning import bump_data_version
+
+
+@receiver([post_save, post_delete], sender=Player)
+@receiver([post_save, post_delete], sender=Match)
+@receiver([post_save, post_delete], sender=PlayerMatchStats)
+def bump_game_data_version(sender, instance, **kwargs):
+    bump_data_version(instance.game_name)
+
+
+@receiver([post_save, post_delete], sender=Player)
+def invalidate_player_responses(sender, instance, **kwargs):
+    invalidate_cached_responses('player', instance.game_name, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Match)
+def invalidate_match_responses(sender, instance, **kwargs):
+    invalidate_cached_responses('match', instance.game_name, instance.pk)
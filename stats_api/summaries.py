@@ -0,0 +1,81 @@
+from collections import defaultdict
+
+import numpy as np
+from django.db.models import Avg, Count, F, Max, Min, Q, Window
+from django.db.models.functions import RowNumber
+
+from .features import comparison_metrics
+from .models import PlayerMatchStats, RankGroupStatsSummary, stats_field_path
+
+# среднее игрока в сравнении с группой - по его последним матчам
+PLAYER_AVERAGE_MATCHES = 20
+
+
+def latest_player_averages(stats_qs, game_name, last_n=PLAYER_AVERAGE_MATCHES, group_by=()):
+    """Строка на игрока: matches_analyzed и avg_<метрика> по его последним last_n матчам из stats_qs.
+    Последние матчи отбираются ROW_NUMBER() OVER (PARTITION BY player ORDER BY match_timestamp DESC NULLS LAST),
+    средние считаются в SQL"""
+    latest_ids = stats_qs.annotate(
+        row_number=Window(RowNumber(), partition_by=[F('player_id')],
+                          order_by=[F('match_timestamp').desc(nulls_last=True), F('id').desc()])
+    ).filter(row_number__lte=last_n).values('id')
+    return PlayerMatchStats.objects.filter(id__in=latest_ids).values('player_id', *group_by).annotate(
+        matches_analyzed=Count('id'),
+        **{f'avg_{metric}': Avg(stats_field_path(metric)) for metric in comparison_metrics(game_name)}
+    ).order_by()
+
+
+def build_rank_group_summaries(game_name, rank=None, bins=32):
+    """Несохраненные сводки RankGroupStatsSummary для рангов игры (или одного ранга): границы и средние по матчам -
+    одним GROUP BY, гистограммы - по средним игроков за последние PLAYER_AVERAGE_MATCHES матчей"""
+    metrics = comparison_metrics(game_name)
+    stats_qs = PlayerMatchStats.objects.filter(
+        game_name=game_name, player__rank__isnull=False
+    ).exclude(player__rank='')
+    if rank:
+        stats_qs = stats_qs.filter(player__rank=rank)
+
+    # проход 1: границы и средние по каждому рангу
+    boundaries_aggregates = {'player_count': Count('player', distinct=True)}
+    for metric in metrics:
+        path = stats_field_path(metric)
+        boundaries_aggregates.update({
+            f'{metric}_min': Min(path), f'{metric}_max': Max(path), f'{metric}_avg': Avg(path),
+            f'{metric}_count': Count('id', filter=Q(**{f'{path}__isnull': False})),
+        })
+    rank_rows = {row['player__rank']: row for row in
+                 stats_qs.values('player__rank').annotate(**boundaries_aggregates).order_by()}
+    if not rank_rows:
+        return []
+
+    # проход 2: средние игроков - перцентиль показывает место игрока среди игроков, а не среди отдельных матчей.
+    # Строка на игрока, гистограммы строятся в numpy
+    player_averages = defaultdict(lambda: defaultdict(list))
+    for row in latest_player_averages(stats_qs, game_name, group_by=('player__rank',)):
+        for metric in metrics:
+            if row[f'avg_{metric}'] is not None:
+                player_averages[row['player__rank']][metric].append(row[f'avg_{metric}'])
+
+    # общие для всех рангов игры интервалы
+    bin_edges = {}
+    for metric in metrics:
+        values = [value for by_metric in player_averages.values() for value in by_metric[metric]]
+        if not values:
+            bin_edges[metric] = []
+            continue
+        low, high = float(min(values)), float(max(values))
+        bin_edges[metric] = np.linspace(low, high if high > low else low + 1.0, bins + 1).tolist()
+
+    summaries = []
+    for rank_name, row in rank_rows.items():
+        for metric in metrics:
+            edges = bin_edges[metric]
+            histogram = np.histogram(player_averages[rank_name][metric], bins=edges)[0].tolist() if edges else []
+            summaries.append(RankGroupStatsSummary(
+                game_name=game_name, rank=rank_name, metric=metric,
+                match_count=row[f'{metric}_count'], player_count=row['player_count'],
+                min_value=row[f'{metric}_min'], max_value=row[f'{metric}_max'], mean_value=row[f'{metric}_avg'],
+                bin_edges=edges,
+                histogram=histogram,
+            ))
+    return summaries
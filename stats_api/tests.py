@@ -1,3 +1,310 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from datetime import timedelta
+from importlib.util import find_spec
+from unittest import skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from .clustering import CLUSTERING_BACKENDS, assign_to_nearest_core, run_clustering, stratified_sample_indices
+from .exports import EXPORT_HEADER
+from .management.commands.explain_hot_queries import INDEX_SCAN_NODES, hot_queries
+from .models import ClusteringModel, GameNames, Match, Player, PlayerMatchStats
+from .pagination import KeysetPagination
+
+# локальный кеш на время тестов: закешированные ответы API не переходят между тестами
+TEST_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ApiTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+
+
+def create_player_stats(puuid, matches, game_name=GameNames.VALORANT.value, **values):
+    """Игрок со статистикой в каждом из matches; values - поля статистики (в том числе поля игры)"""
+    player = Player.objects.create(game_name=game_name, puuid=puuid, username=puuid)
+    for match in matches:
+        PlayerMatchStats.objects.update_or_create_with_game_stats(
+            game_name=game_name, player=player, match=match, defaults=values)
+    return player
+
+
+@skipUnless(connection.vendor == "postgresql", "Планы запросов проверяются только в PostgreSQL")
+class HotQueryPlanTests(TestCase):
+    """EXPLAIN основных запросов API: каждый должен читать таблицы через индекс"""
+    game_name = GameNames.VALORANT.value
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        players = Player.objects.bulk_create(
+            Player(game_name=cls.game_name, puuid=f"puuid-{i}", username=f"Player{i}", rank=f"Rank{i % 3}")
+            for i in range(30))
+        matches = Match.objects.bulk_create(
+            Match(game_name=cls.game_name, game_match_id=f"match-{i}", match_timestamp=now - timedelta(hours=i),
+                  map_name="Ascent", is_ranked=i % 2 == 0)
+            for i in range(50))
+        # bulk_create не вызывает save() - копии полей матча заполняются здесь
+        PlayerMatchStats.objects.bulk_create(
+            PlayerMatchStats(game_name=cls.game_name, player=player, match=match, kills=i, deaths=1,
+                             match_timestamp=match.match_timestamp, is_ranked=match.is_ranked,
+                             map_name=match.map_name)
+            for i, (player, match) in enumerate((p, m) for p in players for m in matches))
+        with connection.cursor() as cursor:
+            for model in (Player, Match, PlayerMatchStats):
+                cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+    def setUp(self):
+        # на маленьких таблицах планировщик выбирает полный просмотр - проверяется применимость индекса
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_hot_queries_use_index(self):
+        for name, queryset in hot_queries(self.game_name).items():
+            with self.subTest(query=name):
+                plan = queryset.explain()
+                self.assertTrue(any(node in plan for node in INDEX_SCAN_NODES), f"{name} без индекса:\n{plan}")
+
+    def test_last_matches_read_in_index_order(self):
+        """Последние N матчей игрока читаются по pms_player_ts_idx в порядке индекса, без сортировки.
+        На маленьком наборе сортировка дешевле, поэтому она отключается: проверяется, что индекс подходит к ORDER BY"""
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_sort = off")
+        queries = hot_queries(self.game_name)
+        for name in ("match_history_page", "comparison_last_matches"):
+            with self.subTest(query=name):
+                plan = queries[name].explain()
+                self.assertIn("pms_player_ts_idx", plan)
+                self.assertNotIn("Sort", plan)
+
+
+class KeysetPaginationTests(ApiTestCase):
+    """Курсорная пагинация списка матчей: порядок (match_timestamp DESC NULLS LAST, id DESC) в обоих режимах"""
+    url = "/api/matches/"
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        timestamps = [now, now, now - timedelta(hours=1), None, now - timedelta(hours=2), None, now - timedelta(days=1)]
+        Match.objects.bulk_create(
+            Match(game_name=GameNames.VALORANT.value, game_match_id=f"match-{i}", match_timestamp=timestamp)
+            for i, timestamp in enumerate(timestamps))
+        Match.objects.create(game_name=GameNames.PUBG.value, game_match_id="pubg-match", match_timestamp=now)
+        cls.expected_ids = [
+            match.pk for match in sorted(
+                Match.objects.filter(game_name=GameNames.VALORANT.value),
+                key=lambda match: (match.match_timestamp is not None,
+                                   match.match_timestamp.timestamp() if match.match_timestamp else 0, match.pk),
+                reverse=True)]
+
+    def walk_cursor(self, url):
+        ids, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids += [row["id"] for row in response.json()["results"]]
+            url = response.json()["next"]
+            pages += 1
+        return ids, pages
+
+    def test_cursor_walks_every_row_once_in_order(self):
+        ids, pages = self.walk_cursor(f"{self.url}?game_name=valorant&limit=2")
+        self.assertEqual(ids, self.expected_ids)
+        self.assertEqual(pages, 4)
+
+    def test_cursor_page_boundary_inside_null_tail(self):
+        ids, _ = self.walk_cursor(f"{self.url}?game_name=valorant&limit=1")
+        self.assertEqual(ids, self.expected_ids)
+
+    def test_cursor_at_null_timestamp_continues_in_tail(self):
+        null_ids = [pk for pk in self.expected_ids
+                    if Match.objects.get(pk=pk).match_timestamp is None]
+        cursor = KeysetPagination().encode_cursor(None, null_ids[0])
+        response = self.client.get(f"{self.url}?game_name=valorant&cursor={cursor}")
+        self.assertEqual([row["id"] for row in response.json()["results"]], null_ids[1:])
+        self.assertIsNone(response.json()["next"])
+
+    def test_offset_mode_uses_the_same_order(self):
+        response = self.client.get(f"{self.url}?game_name=valorant&offset=0&limit=100")
+        self.assertEqual([row["id"] for row in response.json()["results"]], self.expected_ids)
+
+    def test_bad_cursor_returns_404(self):
+        for cursor in ("not-base64!", "eyJ0cyI6IDF9"):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f"{self.url}?game_name=valorant&cursor={cursor}")
+                self.assertEqual(response.status_code, 404)
+
+
+class ClusteringTests(SimpleTestCase):
+    """Бэкенды кластеризации, выборка и назначение кластеров по сохраненным core-точкам"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = np.random.default_rng(0)
+        # два плотных кластера и редкий шум
+        cls.X = np.vstack([rng.normal(0, 0.3, (400, 2)), rng.normal(5, 0.3, (400, 2)), rng.uniform(-10, 15, (20, 2))])
+
+    def test_stratified_sample_has_exact_size(self):
+        rng = np.random.default_rng(1)
+        for dimensions in (2, 4, 8):
+            X = rng.normal(size=(5000, dimensions))
+            with self.subTest(dimensions=dimensions):
+                indices = stratified_sample_indices(X, 500)
+                self.assertEqual(len(indices), 500)
+                self.assertEqual(len(np.unique(indices)), 500)
+
+    def test_backends_find_both_clusters(self):
+        for backend in CLUSTERING_BACKENDS:
+            with self.subTest(backend=backend):
+                result = run_clustering(self.X, backend=backend, eps=0.5, min_samples=5, n_clusters=2,
+                                        min_cluster_size=20)
+                labels = result["labels"]
+                self.assertEqual(len(labels), len(self.X))
+                self.assertNotEqual(labels[0], labels[400])
+                self.assertEqual(len(set(labels[:400]) - {-1}), 1)
+
+    def test_sampled_fit_reports_sample_size(self):
+        result = run_clustering(self.X, backend="dbscan", eps=0.5, min_samples=5, sample_size=100)
+        self.assertEqual(result["sampled_points"], 100)
+        self.assertEqual(len(result["labels"]), len(self.X))
+
+    def test_hdbscan_model_is_compact_and_assigns_noise(self):
+        result = run_clustering(self.X, backend="hdbscan", min_samples=5, min_cluster_size=20)
+        self.assertLess(len(result["core_points"]), len(self.X) // 4)
+        self.assertEqual(np.ndim(result["max_distance"]), 1)
+        labels = assign_to_nearest_core(np.array([[0.0, 0.0], [5.0, 5.0], [40.0, 40.0]]), result["core_points"],
+                                        result["core_labels"], result["max_distance"])
+        self.assertEqual(labels[0], result["labels"][0])
+        self.assertEqual(labels[1], result["labels"][400])
+        self.assertEqual(labels[2], -1)
+
+
+@override_settings(ANALYTICS_POOL_SIZE=0)
+class DBSCANAssignTests(ApiTestCase):
+    """Сохранение модели кластеризации при перерасчете и назначение по ней кластеров новым игрокам"""
+    analysis_url = "/api/stats/dbscan-analysis/"
+    assign_url = "/api/stats/dbscan-analysis/assign/"
+    analysis_params = "?game_name=valorant&features=avg_kills,avg_deaths&eps=0.5&min_samples=3&min_matches=1"
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.matches = [Match.objects.create(game_name=GameNames.VALORANT.value, game_match_id=f"match-{i}",
+                                            match_timestamp=now - timedelta(hours=i)) for i in range(2)]
+        # две группы игроков: мало убийств и много смертей / много убийств и мало смертей
+        for i in range(12):
+            create_player_stats(f"low-{i}", cls.matches, kills=2 + i % 2, deaths=8)
+            create_player_stats(f"high-{i}", cls.matches, kills=20 + i % 2, deaths=2)
+
+    def post_assign(self, data):
+        return self.client.post(self.assign_url, data, content_type="application/json")
+
+    def test_assign_without_model_returns_404(self):
+        response = self.post_assign({"game_name": "valorant", "puuids": ["low-0"]})
+        self.assertEqual(response.status_code, 404)
+
+    def test_assign_rejects_non_object_body(self):
+        response = self.post_assign(["low-0"])
+        self.assertEqual(response.status_code, 400)
+
+    def test_recluster_saves_model_used_by_assign(self):
+        response = self.client.get(f"{self.analysis_url}{self.analysis_params}&recluster=true&mode=compact")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["analysis_details"]["clusters_found"], 2)
+        self.assertTrue(ClusteringModel.objects.filter(game_name="valorant", backend="dbscan").exists())
+
+        create_player_stats("new-high", self.matches, kills=21, deaths=2)
+        create_player_stats("new-outlier", self.matches, kills=60, deaths=30)
+        response = self.post_assign({"game_name": "valorant", "puuids": ["high-0", "new-high", "new-outlier"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["reclustered"])
+        clusters = {row["puuid"]: row["cluster"] for row in response.json()["assignments"]}
+        self.assertNotEqual(clusters["high-0"], -1)
+        self.assertEqual(clusters["new-high"], clusters["high-0"])
+        self.assertEqual(clusters["new-outlier"], -1)
+
+
+class DataVersionETagTests(ApiTestCase):
+    """ETag списков по версии данных игры: 304 до изменения данных, новый ETag после него"""
+    url = "/api/matches/?game_name=valorant"
+
+    @classmethod
+    def setUpTestData(cls):
+        # bulk_create без сигналов: отложенное увеличение версии из фикстуры поглотило бы увеличения в тестах
+        Match.objects.bulk_create([Match(game_name=GameNames.VALORANT.value, game_match_id="match-0")])
+
+    def test_if_none_match_returns_304(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_saved_row_changes_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        # версия увеличивается после фиксации транзакции
+        with self.captureOnCommitCallbacks(execute=True):
+            Match.objects.create(game_name=GameNames.VALORANT.value, game_match_id="match-1")
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_other_game_keeps_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Match.objects.create(game_name=GameNames.PUBG.value, game_match_id="pubg-match")
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class StatsExportTests(ApiTestCase):
+    """Выгрузка статистики матчей во всех форматах"""
+    url = "/api/export/player-match-stats/?game_name=valorant"
+
+    @classmethod
+    def setUpTestData(cls):
+        matches = [Match.objects.create(game_name=GameNames.VALORANT.value, game_match_id=f"match-{i}",
+                                        match_timestamp=timezone.now() - timedelta(hours=i)) for i in range(2)]
+        create_player_stats("player-0", matches, kills=7, headshots=3)
+        create_player_stats("pubg-player", [Match.objects.create(game_name=GameNames.PUBG.value,
+                                                                  game_match_id="pubg-match")],
+                            game_name=GameNames.PUBG.value, kills=1)
+
+    def export(self, file_format):
+        response = self.client.get(f"{self.url}&file_format={file_format}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(f'player_match_stats.{file_format}"', response["Content-Disposition"])
+        return b"".join(response.streaming_content)
+
+    def test_csv_uses_import_layout(self):
+        rows = list(csv.reader(io.StringIO(self.export("csv").decode())))
+        self.assertEqual(rows[0], EXPORT_HEADER)
+        self.assertEqual(len(rows), 3)
+        record = dict(zip(rows[0], rows[1]))
+        self.assertEqual((record["player_puuid"], record["kills"], record["headshots"]), ("player-0", "7", "3"))
+
+    def test_ndjson_has_object_per_row(self):
+        records = [json.loads(line) for line in self.export("ndjson").decode().splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(list(records[0]), EXPORT_HEADER)
+        self.assertEqual({record["match_game_id"] for record in records}, {"match-0", "match-1"})
+
+    @skipUnless(find_spec("pyarrow"), "Формат parquet требует pyarrow")
+    def test_parquet_round_trip(self):
+        import pyarrow.parquet as pq
+        table = pq.read_table(io.BytesIO(self.export("parquet")))
+        self.assertEqual(table.column_names, EXPORT_HEADER)
+        self.assertEqual(table.column("kills").to_pylist(), [7, 7])
+
+    def test_unknown_format_returns_400(self):
+        response = self.client.get(f"{self.url}&file_format=xlsx")
+        self.assertEqual(response.status_code, 400)
@@ -1,15 +1,38 @@
 from django.urls import path, include
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
 from rest_framework.routers import DefaultRouter
+from .async_views import (
+    AvailableGamesView,
+    MatchByGameMatchIdView,
+    PlayerByPuuidView,
+    PlayerByUsernameView,
+    PlayerMatchStatsByIdentifiersView,
+)
 from .views import (
     PlayerViewSet,
     MatchViewSet,
     PlayerMatchStatsViewSet,
-    DBSCANAnalysisView,
     CSVImportView,
-    AvailableGamesView,
-    PlayerComparisonView,
+    StatsExportView,
 )
 
+
+def lazy_view(dotted_path):
+    """Представление, класс которого импортируется при первом запросе: модуль аналитики
+    с pandas/scikit-learn не загружается процессами, которые обслуживают только остальные эндпоинты"""
+    view = None
+
+    @csrf_exempt
+    def view_func(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view()
+        return view(request, *args, **kwargs)
+
+    return view_func
+
+
 router = DefaultRouter()
 
 router.register(r'players', PlayerViewSet, basename='player')
@@ -18,9 +41,20 @@ router.register(r'matches', MatchViewSet, basename='match')
 router.register(r'player-match-stats', PlayerMatchStatsViewSet, basename='playermatchstats')
 
 urlpatterns = [
+    # async эндпоинты поиска объявлены до маршрутов router, чтобы не совпасть с карточками по pk
+    path('players/by_puuid/', PlayerByPuuidView.as_view(), name='player-by-puuid'),
+    path('players/by_username/', PlayerByUsernameView.as_view(), name='player-by-username'),
+    path('matches/by_game_match_id/', MatchByGameMatchIdView.as_view(), name='match-by-game-match-id'),
+    path('player-match-stats/by_identifiers/', PlayerMatchStatsByIdentifiersView.as_view(),
+         name='playermatchstats-by-identifiers'),
     path('', include(router.urls)),
-    path('stats/dbscan-analysis/', DBSCANAnalysisView.as_view(), name='dbscan_analysis'),
+    path('stats/dbscan-analysis/', lazy_view('stats_api.analytics_views.DBSCANAnalysisView'), name='dbscan_analysis'),
+    path('stats/dbscan-analysis/cluster-players/', lazy_view('stats_api.analytics_views.DBSCANClusterPlayersView'), name='dbscan_cluster_players'),
+    path('stats/dbscan-analysis/assign/', lazy_view('stats_api.analytics_views.DBSCANAssignView'), name='dbscan_assign'),
     path('import-csv/', CSVImportView.as_view(), name='csv_import'),
+    path('export/player-match-stats/', StatsExportView.as_view(), name='stats_export'),
     path('available-games/', AvailableGamesView.as_view(), name='available_games'),
-    path('stats/player-comparison/', PlayerComparisonView.as_view(), name='player_comparison'),
+    path('stats/player-comparison/', lazy_view('stats_api.analytics_views.PlayerComparisonView'), name='player_comparison'),
+    path('stats/player-comparison/batch/', lazy_view('stats_api.analytics_views.PlayerComparisonBatchView'), name='player_comparison_batch'),
+    path('stats/player-form/', lazy_view('stats_api.analytics_views.PlayerFormView'), name='player_form'),
 ]
\ No newline at end of file
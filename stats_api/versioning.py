@@ -0,0 +1,100 @@
+import hashlib
+from functools import partial, wraps
+
+from django.db import transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .models import GameDataVersion
+
+def _apply_bump(game_name):
+    updated = GameDataVersion.objects.filter(game_name=game_name).update(
+        version=F('version') + 1, updated_at=timezone.now())
+    if not updated:
+        GameDataVersion.objects.get_or_create(game_name=game_name, defaults={'version': 1})
+
+
+def bump_data_version(game_name):
+    """Увеличивает версию данных игры после фиксации транзакции - один раз за транзакцию,
+    даже если в ней сохранено много строк. При откате транзакции версия не меняется"""
+    if not game_name:
+        return
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and any(
+            getattr(entry[1], 'data_version_game', None) == game_name for entry in connection.run_on_commit):
+        return
+    callback = partial(_apply_bump, game_name)
+    callback.data_version_game = game_name
+    transaction.on_commit(callback)
+
+
+def get_data_version(game_name=None):
+    """(версия, время изменения) данных игры; без game_name - по всем играм"""
+    aggregates = _data_version_queryset(game_name).aggregate(version=Sum('version'), updated_at=Max('updated_at'))
+    return aggregates['version'] or 0, aggregates['updated_at']
+
+
+async def aget_data_version(game_name=None):
+    aggregates = await _data_version_queryset(game_name).aaggregate(version=Sum('version'), updated_at=Max('updated_at'))
+    return aggregates['version'] or 0, aggregates['updated_at']
+
+
+def _data_version_queryset(game_name):
+    queryset = GameDataVersion.objects.all()
+    if game_name:
+        queryset = queryset.filter(game_name=game_name)
+    return queryset
+
+
+def _request_game_name(request):
+    return request.GET.get('game_name', '').strip().lower() or None
+
+
+def _validators(request, game_name, version, updated_at):
+    etag = quote_etag(hashlib.md5(f"{request.get_full_path()}|{game_name}|{version}".encode()).hexdigest())
+    last_modified = int(updated_at.timestamp()) if updated_at else None
+    return etag, last_modified
+
+
+def _patch_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified)
+        # прокси может хранить ответ, но обязан перепроверять его по ETag
+        patch_cache_control(response, public=True, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def conditional_on_data_version(view_method):
+    """ETag/Last-Modified для GET метода представления по версии данных игры из параметра game_name.
+    При совпадении возвращается 304 без выполнения запросов и сериализации"""
+
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        game_name = _request_game_name(request)
+        etag, last_modified = _validators(request, game_name, *get_data_version(game_name))
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view_method(self, request, *args, **kwargs)
+        return _patch_validators(response, etag, last_modified)
+
+    return wrapper
+
+
+def async_conditional_on_data_version(view_method):
+    """conditional_on_data_version для async метода представления"""
+
+    @wraps(view_method)
+    async def wrapper(self, request, *args, **kwargs):
+        game_name = _request_game_name(request)
+        etag, last_modified = _validators(request, game_name, *await aget_data_version(game_name))
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await view_method(self, request, *args, **kwargs)
+        return _patch_validators(response, etag, last_modified)
+
+    return wrapper
@@ -5,83 +5,39 @@ from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.parsers import MultiPartParser, FormParser
 import django_filters.rest_framework
 
+from django.conf import settings
 from django.db import transaction, IntegrityError
-from django.db.models import Sum, Count, Q, Avg, F, Value, FloatField, CharField, Field, Case, When, IntegerField, Min, Max
-from django.db.models.functions import Coalesce, Cast
+from django.db.models import F
+from django.http import StreamingHttpResponse
 from django.utils.dateparse import parse_datetime
 
 import csv
 import io
-import numpy as np
-import pandas as pd
-from collections import defaultdict
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import DBSCAN
 
 import logging
 
-from .models import Player, PlayerMatchStats, GameNames, Match
+from .exports import EXPORT_FORMATS, iter_export_rows, stream_csv, stream_ndjson, stream_parquet
+from .models import Player, PlayerMatchStats, Match
+from .pagination import KeysetPagination
+from .caching import cached_response
+from .versioning import conditional_on_data_version
 from .serializers import (
+    FlatPlayerMatchStatsSerializer,
     PlayerSerializer,
     MatchSerializer,
     PlayerMatchStatsSerializer,
-    DBSCANResultSerializer,
 )
 
 logger_views = logging.getLogger(__name__)
 
 
-# Вспомогательные функции
-def safe_division_scalar(numerator, denominator, default=0.0):
-    if numerator is None or denominator is None or pd.isna(numerator) or pd.isna(denominator) or denominator == 0:
-        return default
-    try:
-        result = numerator / denominator
-        if pd.isna(result) or result == float("inf") or result == float("-inf"):
-            return default
-        return result
-    except (TypeError, ZeroDivisionError):
-        return default
-
-
-def safe_division_series(numerator_series, denominator_series, default=0.0):
-    num_is_series = isinstance(numerator_series, pd.Series)
-    den_is_series = isinstance(denominator_series, pd.Series)
-
-    if not num_is_series and not den_is_series:
-        return safe_division_scalar(numerator_series, denominator_series, default)
-
-    if not num_is_series:
-        numerator_series = pd.Series(numerator_series, index=denominator_series.index if den_is_series else None)
-    if not den_is_series:
-        denominator_series = pd.Series(denominator_series, index=numerator_series.index if num_is_series else None)
-
-    if num_is_series and den_is_series and not numerator_series.index.equals(denominator_series.index):
-        logger_views.warning("Series for safe_division have mismatched indexes. Attempting to align if lengths match.")
-        if len(numerator_series) == len(denominator_series):
-            try:
-                denominator_series = denominator_series.reindex(numerator_series.index)
-            except Exception as e:
-                logger_views.error(f"Failed to reindex series in safe_division: {e}")
-                return pd.Series(default, index=numerator_series.index, dtype=float)
-        else:
-            return pd.Series(default, index=numerator_series.index, dtype=float)
-
-    result_series = pd.Series(default, index=numerator_series.index, dtype=float)
-    safe_condition = (denominator_series != 0) & (~pd.isna(denominator_series)) & (~pd.isna(numerator_series))
-
-    if safe_condition.any():
-        safe_num = numerator_series[safe_condition].astype(float)
-        safe_den = denominator_series[safe_condition].astype(float)
-        result_series.loc[safe_condition] = safe_num / safe_den
-
-    result_series.replace([np.inf, -np.inf], default, inplace=True)
-    result_series.fillna(default, inplace=True)
-    return result_series
+def filter_game_name(queryset, name, value):
+    """game_name хранится в нижнем регистре: точное сравнение вместо iexact использует индексы по game_name"""
+    return queryset.filter(**{name: value.strip().lower()})
 
 
 class PlayerFilter(django_filters.FilterSet):
-    game_name = django_filters.CharFilter(lookup_expr='iexact')
+    game_name = django_filters.CharFilter(method=filter_game_name)
 
     class Meta:
         model = Player
@@ -89,7 +45,7 @@ class PlayerFilter(django_filters.FilterSet):
 
 
 class MatchFilter(django_filters.FilterSet):
-    game_name = django_filters.CharFilter(lookup_expr='iexact')
+    game_name = django_filters.CharFilter(method=filter_game_name)
     is_ranked = django_filters.BooleanFilter()
     map_name = django_filters.CharFilter(lookup_expr='icontains')
     game_mode = django_filters.CharFilter(lookup_expr='icontains')
@@ -99,6 +55,15 @@ class MatchFilter(django_filters.FilterSet):
         fields = ['game_name', 'is_ranked', 'map_name', 'game_mode']
 
 
+def get_flat_stats_serializer(request):
+    """Плоский сериализатор статистики при ?fields=... или ?mode=compact, иначе None"""
+    fields_param = request.query_params.get('fields')
+    if not fields_param and request.query_params.get('mode', '').strip().lower() != 'compact':
+        return None
+    fields = [name.strip() for name in fields_param.split(',') if name.strip()] if fields_param else None
+    return FlatPlayerMatchStatsSerializer(fields)
+
+
 class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Player.objects.all().order_by("username", "game_name")
     serializer_class = PlayerSerializer
@@ -106,46 +71,16 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
     filterset_class = PlayerFilter
 
-    @action(detail=False, methods=['get'], url_path='by_puuid')
-    def by_puuid(self, request):
-        puuid = request.query_params.get('puuid')
-        game_name = request.query_params.get('game_name', '').strip().lower()
-        if not puuid or not game_name:
-            return Response({'error': 'Параметры puuid и game_name обязательны.'}, status=status.HTTP_400_BAD_REQUEST)
-        try:
-            player = Player.objects.get(puuid__iexact=puuid, game_name=game_name)
-            serializer = self.get_serializer(player)
-            return Response(serializer.data)
-        except Player.DoesNotExist:
-            return Response({'detail': f'Игрок с PUUID {puuid} для игры {game_name} не найден.'},
-                            status=status.HTTP_404_NOT_FOUND)
-        except Player.MultipleObjectsReturned:
-            logger_views.error(f"Найдено несколько игроков для puuid {puuid} и игры {game_name}")
-            return Response({'detail': 'Найдено несколько игроков. Проблема целостности данных.'},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    @cached_response('player')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
-    @action(detail=False, methods=['get'], url_path='by_username')
-    def by_username(self, request):
-        username = request.query_params.get('username')
-        game_name = request.query_params.get('game_name', '').strip().lower()
-        if not username or not game_name:
-            return Response({'error': 'Параметры username и game_name обязательны.'},
-                            status=status.HTTP_400_BAD_REQUEST)
-
-        players = Player.objects.filter(username__iexact=username, game_name=game_name)
-        if not players.exists():
-            return Response({'detail': f'Игрок с Username {username} для игры {game_name} не найден.'},
-                            status=status.HTTP_404_NOT_FOUND)
-
-        if players.count() > 1:
-            logger_views.warning(
-                f"Найдено несколько игроков для username '{username}' и игры {game_name}. Возвращаем первого.")
-
-        player = players.first()
-        serializer = self.get_serializer(player)
-        return Response(serializer.data)
+    @cached_response('player')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=False, methods=["get"], url_path="match-history")
+    @conditional_on_data_version
     def match_history(self, request):
         player_puuid = request.query_params.get('player_puuid')
         game_name = request.query_params.get('game_name', '').strip().lower()
@@ -154,84 +89,66 @@ class PlayerViewSet(viewsets.ReadOnlyModelViewSet):
                             status=status.HTTP_400_BAD_REQUEST)
 
         try:
-            player = Player.objects.get(puuid__iexact=player_puuid, game_name=game_name)
+            player = Player.objects.puuid_iexact(player_puuid).get(game_name=game_name)
         except Player.DoesNotExist:
             return Response({'detail': f'Игрок с PUUID {player_puuid} и игрой {game_name} не найден.'},
                             status=status.HTTP_404_NOT_FOUND)
 
-        queryset = PlayerMatchStats.objects.filter(player=player).select_related("match", "player").order_by(
-            '-match__match_timestamp')
+        queryset = PlayerMatchStats.objects.filter(player=player).select_related(
+            "match", "player", "valorant", "pubg").order_by(
+            F('match_timestamp').desc(nulls_last=True), '-id')
 
-        page = self.paginate_queryset(queryset)
+        # история матчей листается курсором по (match_timestamp, id), а не общим LimitOffsetPagination списка игроков
+        paginator = KeysetPagination()
+        flat_serializer = get_flat_stats_serializer(request)
+        if flat_serializer:
+            page = paginator.paginate_queryset(queryset.values(*flat_serializer.value_fields), request, view=self)
+            return paginator.get_paginated_response(flat_serializer.rows(page))
+
+        page = paginator.paginate_queryset(queryset, request, view=self)
         if page is not None:
             serializer = PlayerMatchStatsSerializer(page, many=True, context={"request": request})
-            return self.get_paginated_response(serializer.data)
+            return paginator.get_paginated_response(serializer.data)
 
         serializer = PlayerMatchStatsSerializer(queryset, many=True, context={"request": request})
         return Response(serializer.data)
 
 
 class MatchViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = Match.objects.all().order_by('-match_timestamp')
+    queryset = Match.objects.all().order_by(F('match_timestamp').desc(nulls_last=True), '-id')
     serializer_class = MatchSerializer
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetPagination
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend]
     filterset_class = MatchFilter
 
-    @action(detail=False, methods=['get'], url_path='by_game_match_id')
-    def by_game_match_id(self, request):
-        game_match_id = request.query_params.get('game_match_id')
-        game_name = request.query_params.get('game_name', '').strip().lower()
-        if not game_match_id or not game_name:
-            return Response({'error': 'Параметры game_match_id и game_name обязательны.'},
-                            status=status.HTTP_400_BAD_REQUEST)
-        try:
-            match = Match.objects.get(game_match_id__iexact=game_match_id, game_name=game_name)
-            serializer = self.get_serializer(match)
-            return Response(serializer.data)
-        except Match.DoesNotExist:
-            return Response({'detail': f'Матч с ID {game_match_id} для игры {game_name} не найден.'},
-                            status=status.HTTP_404_NOT_FOUND)
-        except Match.MultipleObjectsReturned:
-            logger_views.error(f"Найдено несколько матчей для game_match_id {game_match_id} и игры {game_name}")
-            return Response({'detail': 'Найдено несколько матчей. Проблема целостности данных.'},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    @conditional_on_data_version
+    @cached_response('match')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_on_data_version
+    @cached_response('match')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
 
 class PlayerMatchStatsViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = PlayerMatchStats.objects.select_related('player', 'match').all()
+    queryset = PlayerMatchStats.objects.select_related('player', 'match', 'valorant', 'pubg').order_by(
+        F('match_timestamp').desc(nulls_last=True), '-id')
     serializer_class = PlayerMatchStatsSerializer
+    pagination_class = KeysetPagination
 
-    @action(detail=False, methods=['get'], url_path='by_identifiers')
-    def by_identifiers(self, request):
-        player_puuid = request.query_params.get('player_puuid')
-        game_match_id = request.query_params.get('game_match_id')
-        game_name = request.query_params.get('game_name', '').strip().lower()
+    @conditional_on_data_version
+    def list(self, request, *args, **kwargs):
+        flat_serializer = get_flat_stats_serializer(request)
+        if flat_serializer is None:
+            return super().list(request, *args, **kwargs)
 
-        if not player_puuid or not game_match_id or not game_name:
-            return Response({'error': 'Параметры player_puuid, game_match_id и game_name обязательны.'},
-                            status=status.HTTP_400_BAD_REQUEST)
-        try:
-            player = Player.objects.get(puuid__iexact=player_puuid, game_name=game_name)
-        except Player.DoesNotExist:
-            return Response({'detail': f'Игрок с PUUID {player_puuid} (игра: {game_name}) не найден.'},
-                            status=status.HTTP_404_NOT_FOUND)
-        try:
-            match = Match.objects.get(game_match_id__iexact=game_match_id, game_name=game_name)
-        except Match.DoesNotExist:
-            return Response({'detail': f'Матч с ID {game_match_id} (игра: {game_name}) не найден.'},
-                            status=status.HTTP_404_NOT_FOUND)
-        try:
-            stat_entry = PlayerMatchStats.objects.get(player_id=player.id, match_id=match.id)
-            serializer = self.get_serializer(stat_entry)
-            return Response(serializer.data)
-        except PlayerMatchStats.DoesNotExist:
-            return Response({'detail': 'Статистика для данного игрока и матча не найдена.'},
-                            status=status.HTTP_404_NOT_FOUND)
-        except PlayerMatchStats.MultipleObjectsReturned:
-            logger_views.error(f"Найдено несколько записей статистики для player_id {player.id} и match_id {match.id}")
-            return Response({'detail': 'Найдено несколько записей статистики. Проблема целостности данных.'},
-                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        queryset = self.filter_queryset(self.get_queryset()).values(*flat_serializer.value_fields)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(flat_serializer.rows(page))
+        return Response(flat_serializer.rows(queryset))
 
 
 class CSVImportView(views.APIView):
@@ -492,7 +409,7 @@ class CSVImportView(views.APIView):
                 stats_defaults_cleaned = {k: v for k, v in stats_defaults.items() if
                                           v is not None or k == 'won_match'}
 
-                stat, created = PlayerMatchStats.objects.update_or_create(
+                stat, created = PlayerMatchStats.objects.update_or_create_with_game_stats(
                     player=player,
                     match=match,
                     defaults=stats_defaults_cleaned
@@ -508,401 +425,57 @@ class CSVImportView(views.APIView):
         return {"created": created_count, "updated": updated_count, "skipped": skipped_count}, row_errors
 
 
-class AvailableGamesView(views.APIView):
-    def get(self, request, *args, **kwargs):
-        player_games = Player.objects.values_list('game_name', flat=True).distinct()
-        match_games = Match.objects.values_list('game_name', flat=True).distinct()
-        stats_games = PlayerMatchStats.objects.values_list('game_name', flat=True).distinct()
-
-        all_games_set = set()
-        all_games_set.update(g.lower() for g in player_games if g)
-        all_games_set.update(g.lower() for g in match_games if g)
-        all_games_set.update(g.lower() for g in stats_games if g)
-
-        for value, _ in GameNames.choices:
-            all_games_set.add(value.lower())
-
-        game_options = []
-        for game_value in sorted(list(all_games_set)):
-            label = game_value
-            try:
-                found_choice = next((lbl for val_choice, lbl in GameNames.choices if val_choice.lower() == game_value),
-                                    None)
-                if found_choice:
-                    label = found_choice
-                else:
-                    label = game_value.capitalize() if game_value else "Unknown"
-            except ValueError:
-                label = game_value.capitalize() if game_value else "Unknown"
-            if game_value:
-                game_options.append({'value': game_value, 'label': label})
-
-        return Response(game_options)
-
-
-class DBSCANAnalysisView(views.APIView):
-    permission_classes = []
-
-    def get(self, request, *args, **kwargs):
-        game_name_query = request.query_params.get('game_name', '').strip().lower()
-        if not game_name_query:
-            return Response(
-                {"error": "Параметр 'game_name' обязателен."},
-                status=status.HTTP_400_BAD_REQUEST)
-        game_name = game_name_query
-
-        try:
-            eps = float(request.query_params.get('eps', 0.3))
-            min_samples = int(request.query_params.get('min_samples', 4))
-            min_matches_for_analysis = int(request.query_params.get('min_matches', 5))
-        except ValueError:
-            return Response(
-                {"error": "Параметры 'eps', 'min_samples', 'min_matches' должны быть числами."},
-                status=status.HTTP_400_BAD_REQUEST)
-
-        output_float = FloatField()
-        aggregates_for_features = {
-            'avg_kills': Avg(Coalesce(F('kills'), Value(0)), output_field=output_float),
-            'avg_deaths': Avg(Coalesce(F('deaths'), Value(0)), output_field=output_float),
-            'avg_assists': Avg(Coalesce(F('assists'), Value(0)), output_field=output_float),
-            'avg_kda': Avg(Coalesce(F('kda'), Value(0.0)), output_field=output_float),
-            'avg_headshot_rate': Avg(Coalesce(F('headshot_rate'), Value(0.0)), output_field=output_float),
-            'avg_damage_dealt': Avg(Coalesce(F('damage_dealt'), Value(0.0)), output_field=output_float),
-            'num_matches': Count('id')
-        }
-
-        has_direct_unique_field = False
-        try:
-            PlayerMatchStats._meta.get_field('unique_abilities_used')
-            has_direct_unique_field = True
-            aggregates_for_features['avg_direct_unique_abilities'] = Avg(Coalesce(F('unique_abilities_used'), Value(0)),
-                                                                         output_field=output_float)
-        except Field.DoesNotExist:
-            pass
-        except AttributeError:
-            pass
-
-        try:
-            game_enum_value = GameNames(game_name).value
-            if game_enum_value == GameNames.VALORANT.value:
-                aggregates_for_features.update({
-                    'sum_skills_used': Sum(Coalesce(F('skills_used'), Value(0))),
-                    'sum_ultimates_used': Sum(Coalesce(F('ultimates_used'), Value(0))),
-                })
-            elif game_enum_value == GameNames.PUBG.value:
-                aggregates_for_features.update({
-                    'sum_heals_used': Sum(Coalesce(F('heals_used'), Value(0))),
-                    'sum_boosts_used': Sum(Coalesce(F('boosts_used'), Value(0))),
-                })
-        except ValueError:
-            pass
-
-        player_avg_stats_qs = PlayerMatchStats.objects.filter(
-            game_name=game_name
-        ).values(
-            'player_id',
-            'player__username',
-            'player__puuid'
-        ).annotate(
-            **aggregates_for_features
-        ).filter(
-            num_matches__gte=min_matches_for_analysis
-        ).order_by('player_id')
-
-        if not player_avg_stats_qs.exists():
-            return Response({
-                "analysis_details": {
-                    "game_name": game_name, "eps": eps, "min_samples": min_samples,
-                    "min_matches_per_player": min_matches_for_analysis,
-                    "message": f"Нет данных для анализа DBSCAN для игры '{game_name}' с мин. {min_matches_for_analysis} матчей.",
-                    "total_players_analyzed": 0, "clusters_found": 0, "noise_points": 0,
-                    "features_used": ['combat_performance_score', 'avg_unique_game_abilities'],
-                    "x_axis_label": "Combat Performance Score (масштаб.)",
-                    "y_axis_label": "Avg Unique Game Abilities (масштаб.)"
-                },
-                "clustered_players": {}, "scatter_plot_data": []
-            }, status=status.HTTP_200_OK)
-
-        df = pd.DataFrame.from_records(list(player_avg_stats_qs))
-
-        if has_direct_unique_field and 'avg_direct_unique_abilities' in df.columns and not df[
-            'avg_direct_unique_abilities'].fillna(0).eq(0).all():
-            df['avg_unique_game_abilities'] = df['avg_direct_unique_abilities']
-            logger_views.info(f"DBSCAN для '{game_name}': Используются прямые значения 'avg_direct_unique_abilities'.")
-        else:
-            recalculated = False
-            try:
-                game_enum_value = GameNames(game_name).value
-                if game_enum_value == GameNames.VALORANT.value and 'sum_skills_used' in df.columns and 'sum_ultimates_used' in df.columns:
-                    df['avg_unique_game_abilities'] = safe_division_series(
-                        df['sum_skills_used'].fillna(0) + df['sum_ultimates_used'].fillna(0),
-                        df['num_matches']
-                    )
-                    logger_views.info(f"DBSCAN для '{game_name}': 'avg_unique_game_abilities' вычислено для Valorant.")
-                    recalculated = True
-                elif game_enum_value == GameNames.PUBG.value and 'sum_heals_used' in df.columns and 'sum_boosts_used' in df.columns:
-                    df['avg_unique_game_abilities'] = safe_division_series(
-                        df['sum_heals_used'].fillna(0) + df['sum_boosts_used'].fillna(0),
-                        df['num_matches']
-                    )
-                    logger_views.info(f"DBSCAN для '{game_name}': 'avg_unique_game_abilities' вычислено для PUBG.")
-                    recalculated = True
-            except ValueError:
-                pass
-
-            if not recalculated:
-                if 'avg_direct_unique_abilities' in df.columns:
-                    df['avg_unique_game_abilities'] = df['avg_direct_unique_abilities']
-                    logger_views.info(
-                        f"DBSCAN для '{game_name}': 'avg_unique_game_abilities' взято из пустого/нулевого 'avg_direct_unique_abilities'.")
-                else:
-                    df['avg_unique_game_abilities'] = 0.0
-                    logger_views.info(
-                        f"DBSCAN для '{game_name}': 'avg_unique_game_abilities' установлено в 0 (нет данных или специфичной логики).")
-
-        df['avg_unique_game_abilities'] = df['avg_unique_game_abilities'].fillna(0)
-        if 'avg_direct_unique_abilities' in df.columns:
-            df = df.drop(columns=['avg_direct_unique_abilities'])
-
-        # пасчет combat_performance_score
-        combat_score_components_data = {}
-        base_combat_features = ['avg_kills', 'avg_kda', 'avg_damage_dealt', 'avg_headshot_rate']
-        for feature_name in base_combat_features:
-            if feature_name in df.columns and not df[feature_name].isnull().all():
-                series = df[feature_name].fillna(df[feature_name].median())
-                min_val, max_val = series.min(), series.max()
-                combat_score_components_data[feature_name] = (series - min_val) / (
-                            max_val - min_val) if max_val > min_val else pd.Series(0.5, index=df.index, dtype=float)
-            else:
-                combat_score_components_data[feature_name] = pd.Series(0.0, index=df.index, dtype=float)
-
-        if 'avg_deaths' in df.columns and not df['avg_deaths'].isnull().all():
-            deaths_series = df['avg_deaths'].fillna(df['avg_deaths'].median())
-            min_deaths, max_deaths = deaths_series.min(), deaths_series.max()
-            normalized_deaths = (deaths_series - min_deaths) / (
-                        max_deaths - min_deaths) if max_deaths > min_deaths else pd.Series(0.5, index=df.index,
-                                                                                           dtype=float)
-            combat_score_components_data['inverted_deaths'] = 1 - normalized_deaths
-        else:
-            combat_score_components_data['inverted_deaths'] = pd.Series(0.0, index=df.index, dtype=float)
-
-        combat_score_df = pd.DataFrame(combat_score_components_data)
-        df['combat_performance_score'] = combat_score_df.sum(axis=1).fillna(0) if not combat_score_df.empty else 0.0
-
-        features_for_dbscan_2d = ['combat_performance_score', 'avg_unique_game_abilities']
-        x_axis_label = "Combat Performance Score (масштаб.)"
-        y_axis_label = "Avg Unique Game Abilities (масштаб.)"
-
-        missing_features_for_pca = [f for f in features_for_dbscan_2d if f not in df.columns]
-        if missing_features_for_pca:
-            logger_views.error(f"DBSCAN для '{game_name}': Отсутствуют колонки для анализа: {missing_features_for_pca}")
-            return Response({
-                "analysis_details": {"game_name": game_name,
-                                     "message": f"Отсутствуют данные для фич: {', '.join(missing_features_for_pca)}",
-                                     "total_players_analyzed": df.shape[0], "clusters_found": 0, "noise_points": 0,
-                                     "features_used": features_for_dbscan_2d, "x_axis_label": x_axis_label,
-                                     "y_axis_label": y_axis_label},
-                "clustered_players": {}, "scatter_plot_data": []
-            }, status=status.HTTP_200_OK)
-
-        X = df[features_for_dbscan_2d].fillna(0).values
-        if X.shape[0] < 1 or X.shape[1] != 2:
-            return Response({
-                "analysis_details": {"game_name": game_name, "message": "Не удалось сформировать 2D-данные.",
-                                     "total_players_analyzed": X.shape[0], "clusters_found": 0, "noise_points": 0,
-                                     "features_used": features_for_dbscan_2d, "x_axis_label": x_axis_label,
-                                     "y_axis_label": y_axis_label},
-                "clustered_players": {}, "scatter_plot_data": []
-            }, status=status.HTTP_200_OK)
-
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-        dbscan_model = DBSCAN(eps=eps, min_samples=min_samples)
-        cluster_labels = dbscan_model.fit_predict(X_scaled)
-
-        scatter_plot_data = [{"x": float(X_scaled[i, 0]), "y": float(X_scaled[i, 1]),
-                              "cluster": int(cluster_labels[i]), "username": df.iloc[i]["player__username"]}
-                             for i in range(X_scaled.shape[0])]
-
-        results_for_response = []
-        for index, row in df.iterrows():
-            player_data_dict = {
-                "player_id": int(row["player_id"]),
-                "puuid": str(row.get("player__puuid", "")),
-                "username": str(row["player__username"]),
-                "game_name": game_name,
-                "cluster": int(cluster_labels[index]),
-                "num_matches": int(row.get("num_matches", 0)),
-                "avg_kills": round(row.get('avg_kills', 0.0), 2),
-                "avg_deaths": round(row.get('avg_deaths', 0.0), 2),
-                "avg_assists": round(row.get('avg_assists', 0.0), 2),
-                "avg_kda": round(row.get('avg_kda', 0.0), 2),
-                "avg_headshot_rate": round(row.get('avg_headshot_rate', 0.0), 1),
-                "avg_damage_dealt": round(row.get('avg_damage_dealt', 0.0), 1),
-                "avg_unique_game_abilities": round(df.loc[index, 'avg_unique_game_abilities'], 2),
-                "combat_performance_score": round(df.loc[index, 'combat_performance_score'], 2),
-            }
-            results_for_response.append(player_data_dict)
-
-        serializer = DBSCANResultSerializer(data=results_for_response, many=True)
-        if not serializer.is_valid():
-            logger_views.error(f"Ошибка валидации сериализатора DBSCAN: {serializer.errors}")
-            # логирование данных, которые не прошли валидацию
-            if results_for_response:
-                for i, item_data in enumerate(results_for_response):
-                    temp_serializer = DBSCANResultSerializer(data=item_data)
-                    if not temp_serializer.is_valid():
-                        logger_views.error(f"DEBUG: Ошибка валидации для элемента {i}: {temp_serializer.errors}")
-                        logger_views.error(f"DEBUG: Данные элемента {i}: {item_data}")
-                        if i < 5:
-                            pass
-                        else:
-                            break
-            return Response(serializer.errors, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        final_clustered_players = defaultdict(list)
-        for item in serializer.data:
-            final_clustered_players[item['cluster']].append(item)
-        sorted_final_clustered_players = {k: final_clustered_players[k] for k in sorted(final_clustered_players.keys())}
-
-        return Response({
-            "analysis_details": {
-                "game_name": game_name, "eps": eps, "min_samples": min_samples,
-                "min_matches_per_player": min_matches_for_analysis,
-                "features_used": features_for_dbscan_2d,
-                "total_players_analyzed": X_scaled.shape[0],
-                "clusters_found": len(set(label for label in cluster_labels if label != -1)),
-                "noise_points": int(np.sum(cluster_labels == -1)),
-                "x_axis_label": x_axis_label, "y_axis_label": y_axis_label
-            },
-            "clustered_players": sorted_final_clustered_players,
-            "scatter_plot_data": scatter_plot_data
-        }, status=status.HTTP_200_OK)
-
-
-class PlayerComparisonView(views.APIView):
-    """API эндпоинт для сравнительного анализа игрока"""
+class StatsExportView(views.APIView):
+    """Потоковая выгрузка статистики матчей (CSV в раскладке импорта, NDJSON или Parquet)"""
     permission_classes = []
 
-    def _calculate_player_avg_stats(self, player_stats_qs, game_name):
-        if not player_stats_qs.exists():
-            return None
-        metrics_to_agg = {
-            'avg_kills': Avg('kills'), 'avg_deaths': Avg('deaths'),
-            'avg_assists': Avg('assists'), 'avg_kda': Avg('kda'),
-            'avg_damage_dealt': Avg('damage_dealt'), 'avg_headshot_rate': Avg('headshot_rate')
-        }
-        if game_name == GameNames.VALORANT:
-            metrics_to_agg.update({'avg_skills_used': Avg('skills_used'), 'avg_ultimates_used': Avg('ultimates_used')})
-        elif game_name == GameNames.PUBG:
-            metrics_to_agg.update({'avg_boosts_used': Avg('boosts_used'), 'avg_heals_used': Avg('heals_used')})
-
-        aggregates = player_stats_qs.aggregate(**metrics_to_agg)
-        for key, value in aggregates.items():
-            if value is not None:
-                aggregates[key] = round(value, 2)
-        return aggregates
-
-    def _calculate_group_stats_boundaries(self, group_stats_qs, game_name):
-        if not group_stats_qs.exists():
-            return None
-        metrics_to_agg_expr = {
-            'kills': (Min('kills'), Max('kills'), Avg('kills')),
-            'deaths': (Min('deaths'), Max('deaths'), Avg('deaths')),
-            'assists': (Min('assists'), Max('assists'), Avg('assists')), 'kda': (Min('kda'), Max('kda'), Avg('kda')),
-            'damage_dealt': (Min('damage_dealt'), Max('damage_dealt'), Avg('damage_dealt')),
-            'headshot_rate': (Min('headshot_rate'), Max('headshot_rate'), Avg('headshot_rate')),
-        }
-        if game_name == GameNames.VALORANT:
-            metrics_to_agg_expr.update({
-                'skills_used': (Min('skills_used'), Max('skills_used'), Avg('skills_used')),
-                'ultimates_used': (Min('ultimates_used'), Max('ultimates_used'), Avg('ultimates_used')),
-            })
-        elif game_name == GameNames.PUBG:
-            metrics_to_agg_expr.update({
-                'boosts_used': (Min('boosts_used'), Max('boosts_used'), Avg('boosts_used')),
-                'heals_used': (Min('heals_used'), Max('heals_used'), Avg('heals_used')),
-            })
-        agg_kwargs = {f'{metric}_{func}': expression for metric, expressions in metrics_to_agg_expr.items() for
-                      func, expression in zip(['min', 'max', 'avg'], expressions)}
-        aggregated_results = group_stats_qs.aggregate(**agg_kwargs)
-        stats_boundaries = {}
-        for metric in metrics_to_agg_expr.keys():
-            stats_boundaries[f'avg_{metric}'] = {
-                'min': round(aggregated_results.get(f'{metric}_min', 0) or 0, 2),
-                'max': round(aggregated_results.get(f'{metric}_max', 0) or 0, 2),
-                'avg': round(aggregated_results.get(f'{metric}_avg', 0) or 0, 2),
-            }
-        return stats_boundaries
-
     def get(self, request, *args, **kwargs):
-        game_name = request.query_params.get('game_name')
-        puuid = request.query_params.get('puuid')
-        username = request.query_params.get('username')
-        comparison_rank = request.query_params.get('comparison_rank')
+        game_name = request.query_params.get('game_name', '').strip().lower()
+        file_format = request.query_params.get('file_format', 'csv').strip().lower()
+        player_puuid = request.query_params.get('player_puuid')
+        map_name = request.query_params.get('map_name')
+        ranked_only = request.query_params.get('ranked_only', '').strip().lower() in ['true', '1', 'yes']
 
         if not game_name:
             return Response({"error": "Параметр 'game_name' обязателен."}, status=status.HTTP_400_BAD_REQUEST)
-        if not puuid and not username:
-            return Response({"error": "Необходимо указать 'puuid' или 'username'."}, status=status.HTTP_400_BAD_REQUEST)
-
-        try:
-            if puuid:
-                target_player = Player.objects.get(puuid__iexact=puuid, game_name=game_name)
-            else:
-                target_player = Player.objects.filter(username__iexact=username, game_name=game_name).first()
-
-            if not target_player:
-                raise Player.DoesNotExist
+        if file_format not in EXPORT_FORMATS:
+            return Response({"error": f"Параметр 'file_format' должен быть одним из: {', '.join(EXPORT_FORMATS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if file_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return Response({"error": "Формат 'parquet' требует установленного pyarrow."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = PlayerMatchStats.objects.filter(game_name=game_name)
+        for param, lookup in (('since', 'match_timestamp__gte'), ('until', 'match_timestamp__lt')):
+            value = request.query_params.get(param)
+            if value:
+                parsed = parse_datetime(value)
+                if parsed is None:
+                    return Response({"error": f"Некорректная дата в параметре '{param}'."},
+                                    status=status.HTTP_400_BAD_REQUEST)
+                queryset = queryset.filter(**{lookup: parsed})
+        if player_puuid:
+            queryset = queryset.filter(player__in=Player.objects.puuid_iexact(player_puuid))
+        if map_name:
+            queryset = queryset.filter(map_name=map_name)
+        if ranked_only:
+            queryset = queryset.filter(is_ranked=True)
+        queryset = queryset.order_by('match_timestamp', 'id')
+
+        chunk_size = settings.EXPORT_CHUNK_SIZE
+        rows = iter_export_rows(queryset, chunk_size)
+        if file_format == "csv":
+            content = stream_csv(rows)
+        elif file_format == "ndjson":
+            content = stream_ndjson(rows)
+        else:
+            content = stream_parquet(rows, chunk_size)
 
-        except Player.DoesNotExist:
-            return Response({"error": "Игрок не найден."}, status=status.HTTP_404_NOT_FOUND)
-
-        # считаем статистику игрока для сравнения
-        player_latest_stats_qs = PlayerMatchStats.objects.filter(
-            player=target_player
-        ).order_by('-match__match_timestamp')[:20]
-
-        target_player_avg_stats = self._calculate_player_avg_stats(player_latest_stats_qs, game_name)
-        if not target_player_avg_stats:
-            return Response({
-                "error": f"Для игрока {target_player.username} не найдено достаточно матчей для анализа."
-            }, status=status.HTTP_404_NOT_FOUND)
-
-        # считаем статистику для группы сравнения
-        comparison_group_boundaries = None
-        player_count_in_rank = 0
-        if comparison_rank:
-            players_in_rank = Player.objects.filter(
-                game_name=game_name,
-                rank=comparison_rank
-            ).exclude(id=target_player.id)
-
-            player_count_in_rank = players_in_rank.count()
-
-            if player_count_in_rank > 0:
-                comparison_stats_qs = PlayerMatchStats.objects.filter(player__in=players_in_rank)
-                comparison_group_boundaries = self._calculate_group_stats_boundaries(comparison_stats_qs, game_name)
-
-        # получаем список всех доступных рангов
-        available_ranks = list(Player.objects.filter(
-            game_name=game_name, rank__isnull=False
-        ).exclude(rank='').values_list('rank', flat=True).distinct().order_by('rank'))
-
-        response_data = {
-            "target_player": {
-                "id": target_player.id,
-                "username": target_player.username,
-                "rank": target_player.rank,
-                "stats": target_player_avg_stats,
-                "matches_analyzed": player_latest_stats_qs.count()
-            },
-            "comparison_group": {
-                "rank": comparison_rank,
-                "player_count": player_count_in_rank,
-                "stats_boundaries": comparison_group_boundaries
-            },
-            "available_ranks": available_ranks
-        }
-
-        return Response(response_data, status=status.HTTP_200_OK)
\ No newline at end of file
+        content_type, extension = EXPORT_FORMATS[file_format]
+        response = StreamingHttpResponse(content, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{game_name}_player_match_stats.{extension}"'
+        logger_views.info(f"Выгрузка статистики '{game_name}' в формате {file_format}")
+        return response